@@ -32,5 +32,7 @@ app = create_app()
 # -----------------------------
 # Run the app if this file is executed directly.
 # 'debug=True' enables hot reload and better error messages in development.
+# For production, run Gunicorn instead (see gunicorn.conf.py):
+#     (venv) $ gunicorn
 if __name__ == "__main__":
     app.run(debug=True)
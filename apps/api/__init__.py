@@ -0,0 +1 @@
+# Empty or can contain package-level imports if needed
@@ -0,0 +1,211 @@
+from flask import Blueprint, request, jsonify, url_for
+from apps.books.models import (
+    BOOK_COLUMNS, BOOK_LIST_COLUMNS, BOOK_SORT_KEYS,
+    get_book, get_books_keyset_page, decode_cursor,
+)
+from apps.categories.models import get_category_cache  # Cached category lookups
+from core.cache import cached_page # Rendered-page cache (ETag / 304) coming from core/cache.py
+from core.changes import get_changes, get_latest_seq, get_purged_through # Change log coming from core/changes.py
+from core.snapshot import get_read_connection # Read connection helper coming from core/snapshot.py
+
+# Read-only JSON API, versioned by its URL prefix (/api/v1, see Config.BLUEPRINTS)
+api_bp = Blueprint(
+    "api",
+    __name__,
+)
+
+
+# ---------------------------
+# Limits and fields
+# ---------------------------
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+CATEGORY_FIELDS = ("id", "name", "description")
+
+# Query arguments of /books carried over into its next/prev links
+BOOK_LIST_ARGS = ("fields", "include", "sort", "order", "limit")
+
+
+class APIError(Exception):
+    """An error answered as JSON: {"error": message} with `status`."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@api_bp.errorhandler(APIError)
+def handle_api_error(error):
+    return jsonify({"error": error.message}), error.status
+
+
+def parse_fields(allowed, default):
+    """Return the `fields=` projection (comma-separated) or `default`."""
+    raw = request.args.get("fields")
+    if not raw:
+        return default
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown or not fields:
+        raise APIError(f"Unknown fields: {', '.join(unknown) or raw}. Allowed: {', '.join(allowed)}")
+    return fields
+
+
+def parse_include():
+    """Return the set of `include=` embeddings (only "category" exists)."""
+    include = {i.strip() for i in request.args.get("include", "").split(",") if i.strip()}
+    if include - {"category"}:
+        raise APIError("Only include=category is supported")
+    return include
+
+
+def serialize_book(book, fields, include, categories):
+    """Project a book row onto `fields`, embedding its category if requested."""
+    data = {field: book[field] for field in fields}
+    if "category" in include:
+        category = categories.get(book["category_id"])
+        data["category"] = {f: category[f] for f in CATEGORY_FIELDS} if category else None
+    return data
+
+
+# ---------------------------
+# Books
+# ---------------------------
+@api_bp.route("/books")
+@cached_page(query_args=BOOK_LIST_ARGS + ("cursor", "dir"))
+def books():
+    """
+    List books with keyset pagination.
+
+    Query string:
+        fields   : Comma-separated columns (default: all but `summary`)
+        include  : "category" embeds {id, name, description}
+        sort     : id | published_date | author | title (default: id)
+        order    : asc | desc (default: desc)
+        limit    : Page size, 1..API_MAX_PAGE_SIZE
+        cursor   : `next_cursor` / `prev_cursor` of a previous response
+        dir      : "prev" to walk backwards from `cursor`
+    """
+    fields = parse_fields(BOOK_COLUMNS, BOOK_LIST_COLUMNS)
+    include = parse_include()
+
+    sort = request.args.get("sort", "id")
+    if sort not in BOOK_SORT_KEYS:
+        raise APIError(f"sort must be one of: {', '.join(BOOK_SORT_KEYS)}")
+    order = request.args.get("order", "desc")
+    if order not in ("asc", "desc"):
+        raise APIError("order must be asc or desc")
+    limit = request.args.get("limit", API_PAGE_SIZE, type=int)
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        raise APIError(f"limit must be between 1 and {API_MAX_PAGE_SIZE}")
+    direction = "prev" if request.args.get("dir") == "prev" else "next"
+
+    cursor = None
+    if request.args.get("cursor"):
+        cursor = decode_cursor(request.args["cursor"])
+        if cursor is None:
+            raise APIError("Malformed cursor")
+
+    rows, prev_cursor, next_cursor = get_books_keyset_page(
+        sort, order, cursor, direction, page_size=limit, columns=fields
+    )
+    categories = get_category_cache().by_id
+
+    def page_url(token, dir=None):
+        if token is None:
+            return None
+        args = {k: request.args[k] for k in BOOK_LIST_ARGS if k in request.args}
+        return url_for("api.books", **args, cursor=token, dir=dir)
+
+    return jsonify({
+        "data": [serialize_book(row, fields, include, categories) for row in rows],
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "links": {
+            "next": page_url(next_cursor),
+            "prev": page_url(prev_cursor, "prev"),
+        },
+    })
+
+
+@api_bp.route("/books/<int:id>")
+@cached_page(query_args=("fields", "include"))
+def book(id):
+    """Return one book; accepts `fields=` and `include=category`."""
+    fields = parse_fields(BOOK_COLUMNS, BOOK_COLUMNS)
+    include = parse_include()
+    row = get_book(id)
+    if row is None:
+        raise APIError("Book not found", 404)
+    return jsonify({"data": serialize_book(row, fields, include, get_category_cache().by_id)})
+
+
+# ---------------------------
+# Categories
+# ---------------------------
+@api_bp.route("/categories")
+@cached_page(query_args=("fields",))
+def categories():
+    """List every category (sorted by name); accepts `fields=`."""
+    fields = parse_fields(CATEGORY_FIELDS, CATEGORY_FIELDS)
+    rows = get_category_cache().sorted_by_name
+    return jsonify({"data": [{f: row[f] for f in fields} for row in rows]})
+
+
+@api_bp.route("/categories/<int:id>")
+@cached_page(query_args=("fields",))
+def category(id):
+    """Return one category; accepts `fields=`."""
+    fields = parse_fields(CATEGORY_FIELDS, CATEGORY_FIELDS)
+    row = get_category_cache().by_id.get(id)
+    if row is None:
+        raise APIError("Category not found", 404)
+    return jsonify({"data": {f: row[f] for f in fields}})
+
+
+# ---------------------------
+# Change Feed
+# ---------------------------
+@api_bp.route("/changes")
+def changes():
+    """
+    List book and category changes after `since`, oldest first.
+
+    Query string:
+        since : Last seq already applied (default: 0, i.e. from the start)
+        limit : Page size, 1..API_MAX_PAGE_SIZE
+
+    A mirror syncs by re-fetching the rows named in `data` (or deleting
+    them for op "delete") and continuing from `next_since`. A 410 means the
+    entries after `since` were compacted away: reload /books and /categories,
+    then follow the feed from the `latest` seq read before reloading.
+    """
+    since = request.args.get("since", "0")
+    if not since.isdigit():
+        raise APIError("since must be a non-negative integer")
+    since = int(since)
+    limit = request.args.get("limit", API_PAGE_SIZE, type=int)
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        raise APIError(f"limit must be between 1 and {API_MAX_PAGE_SIZE}")
+
+    conn = get_read_connection()
+    purged_through = get_purged_through(conn)
+    if since < purged_through:
+        raise APIError(f"Changes up to seq {purged_through} were compacted away; resync the catalogue", 410)
+
+    entries = get_changes(conn, since, limit + 1)
+    has_more = len(entries) > limit
+    del entries[limit:]
+    next_since = entries[-1]["seq"] if entries else since
+
+    return jsonify({
+        "data": entries,
+        "next_since": next_since,
+        "has_more": has_more,
+        "latest": get_latest_seq(conn),
+        "links": {
+            "next": url_for("api.changes", since=next_since, limit=limit) if has_more else None,
+        },
+    })
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+import tempfile
+
+from .models import EXPORT_COLUMNS
+
+
+# ---------------------------
+# Streaming writers
+# ---------------------------
+# Each writer takes an iterable of rows and yields the file in pieces, so a
+# response built from it never holds the whole catalogue in memory.
+
+def stream_csv(rows):
+    """Yield a CSV file (header + one line per row)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([row[column] for column in EXPORT_COLUMNS])
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_jsonl(rows):
+    """Yield JSON Lines (one JSON object per row)."""
+    for row in rows:
+        yield json.dumps({column: row[column] for column in EXPORT_COLUMNS}, ensure_ascii=False) + "\n"
+
+
+def stream_xlsx(rows, chunk_size=64 * 1024):
+    """
+    Yield an .xlsx workbook.
+
+    openpyxl's write-only mode spools rows to disk as they are appended, so
+    memory stays flat; the finished file is then streamed from a temp file.
+    """
+    from openpyxl import Workbook  # Deferred: only XLSX exports need openpyxl
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Books")
+    ws.append(EXPORT_COLUMNS)
+    for row in rows:
+        ws.append([row[column] for column in EXPORT_COLUMNS])
+
+    with tempfile.TemporaryFile() as f:
+        wb.save(f)
+        f.seek(0)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+# Format name -> (writer, mimetype)
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "jsonl": (stream_jsonl, "application/x-ndjson"),
+    "xlsx": (stream_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
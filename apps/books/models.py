@@ -1,46 +1,453 @@
-import sqlite3
-from flask import current_app
+import base64
+import json
 
-def get_db_connection():
-    db_path = current_app.config["DATABASE"]
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+from markupsafe import Markup, escape
 
+from core.snapshot import get_read_connection  # Request-scoped read connection (DB file or in-memory snapshot)
+from apps.categories.models import get_categories_sorted, get_category_names  # Cached category lookups
 
-def get_all_books():
-    """Return all books with category name."""
-    conn = get_db_connection()
-    query = """
-        SELECT b.*, c.name AS category_name
+
+def iter_with_category_names(rows):
+    """
+    Yield rows as dicts with `category_name` filled in from the category cache.
+
+    This replaces `LEFT JOIN categories` in the book queries. Rows are
+    converted one at a time, so a DB cursor is never read ahead.
+    """
+    names = get_category_names()
+    for row in rows:
+        book = dict(row)
+        book["category_name"] = names.get(book["category_id"])
+        yield book
+
+
+def with_category_names(rows):
+    """Return rows as a list of dicts with `category_name` (see iter_with_category_names)."""
+    return list(iter_with_category_names(rows))
+
+
+# Every column of `books`, and the ones list pages select (no large `summary`).
+# Only these names are ever interpolated into SELECT.
+BOOK_COLUMNS = (
+    "id", "published_date", "title", "hepburn", "author",
+    "release", "url", "summary", "category_id",
+)
+BOOK_LIST_COLUMNS = tuple(c for c in BOOK_COLUMNS if c != "summary")
+
+
+# Sort keys accepted by KeysetPage (name -> indexed SQL column).
+# Each one is backed by an index on (column, id), see core/schema.py.
+BOOK_SORT_KEYS = {
+    "id": "b.id",
+    "published_date": "b.published_date",
+    "author": "b.author",
+    "title": "b.title",
+}
+
+
+def encode_cursor(row, sort):
+    """Encode the (sort_key, id) position of a row as an opaque URL-safe token."""
+    payload = json.dumps([row[sort], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Decode a cursor from encode_cursor(). Returns None if it is malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value, id = json.loads(base64.urlsafe_b64decode(padded))
+        return value, int(id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _keyset_query(sort, order, cursor, direction, limit, columns=BOOK_LIST_COLUMNS, category_id=None):
+    """
+    Build the keyset query behind KeysetPage.
+
+    Instead of OFFSET, the page position is a cursor on (sort_key, id), so
+    the query seeks straight into the (sort_key, id) index and a deep page
+    costs the same as the first one.
+
+    `columns` (names from BOOK_COLUMNS) is the SELECT list. With
+    `category_id`, only that category's books are listed; sorted by
+    published_date, the page then seeks the (category_id, published_date, id)
+    index directly.
+
+    Returns:
+        tuple: (sql, params, backwards); rows come back in scan order, which
+               is the reverse of display order when `backwards` is true
+    """
+    column = BOOK_SORT_KEYS.get(sort, "b.id")
+    descending = order != "asc"
+
+    # Walking backwards means scanning in the opposite order, then flipping
+    backwards = direction == "prev"
+    scan_desc = descending != backwards
+    sql_order = "DESC" if scan_desc else "ASC"
+
+    filters = []
+    params = []
+    if category_id is not None:
+        filters.append("b.category_id = ?")
+        params.append(category_id)
+    if cursor is not None:
+        op = "<" if scan_desc else ">"
+        if column == "b.id":
+            filters.append(f"b.id {op} ?")
+            params.append(cursor[1])
+        else:
+            filters.append(f"({column}, b.id) {op} (?, ?)")
+            params.extend([cursor[0], cursor[1]])
+    where = "WHERE " + " AND ".join(filters) if filters else ""
+
+    if column == "b.id":
+        order_by = f"b.id {sql_order}"
+    else:
+        order_by = f"{column} {sql_order}, b.id {sql_order}"
+
+    select = ", ".join(f"b.{c}" for c in columns if c in BOOK_COLUMNS)
+    query = f"""
+        SELECT {select}
         FROM books b
-        LEFT JOIN categories c ON b.category_id = c.id
-        ORDER BY b.id DESC
+        {where}
+        ORDER BY {order_by}
+    """
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params, backwards
+
+
+class KeysetPage:
+    """
+    One keyset page of books, read lazily from the SQLite cursor.
+
+    Iterating yields the page's rows in display order, straight from the
+    cursor (one extra row is fetched to know whether another page exists).
+    `prev_cursor` / `next_cursor` are only known once the rows have been
+    iterated, so streamed templates must use them after the loop.
+
+    A page walked backwards ("prev") is scanned in reverse, so its rows are
+    buffered (at most `page_size + 1`) to be flipped.
+
+    `columns` narrows the SELECT list (names from BOOK_COLUMNS); `id`, the
+    sort key and `category_id` are always included. `category_id` limits
+    the page to one category's books.
+    """
+
+    def __init__(self, sort="id", order="desc", cursor=None, direction="next", page_size=10,
+                 columns=BOOK_LIST_COLUMNS, category_id=None):
+        self.columns = tuple(dict.fromkeys(("id", sort, "category_id", *columns)))
+        self.category_id = category_id
+        self.sort = sort
+        self.order = order
+        self.cursor = cursor
+        self.direction = direction
+        self.page_size = page_size
+        self.first = None
+        self.last = None
+        self.more = False
+
+    def __iter__(self):
+        query, params, backwards = _keyset_query(
+            self.sort, self.order, self.cursor, self.direction, self.page_size + 1, self.columns,
+            self.category_id,
+        )
+        rows = iter_with_category_names(get_read_connection().execute(query, params))
+        if backwards:
+            scanned = list(rows)
+            self.more = len(scanned) > self.page_size
+            rows = reversed(scanned[:self.page_size])
+
+        count = 0
+        for row in rows:
+            if count == self.page_size:
+                self.more = True  # The look-ahead row: another page exists
+                break
+            if count == 0:
+                self.first = row
+            self.last = row
+            count += 1
+            yield row
+
+    @property
+    def next_cursor(self):
+        # Coming from a cursor means there is a page on the side we came from
+        has_next = self.more if self.direction != "prev" else self.cursor is not None
+        return encode_cursor(self.last, self.sort) if self.last and has_next else None
+
+    @property
+    def prev_cursor(self):
+        has_prev = self.more if self.direction == "prev" else self.cursor is not None
+        return encode_cursor(self.first, self.sort) if self.first and has_prev else None
+
+
+def get_books_keyset_page(sort="id", order="desc", cursor=None, direction="next", page_size=10,
+                          columns=BOOK_LIST_COLUMNS):
+    """
+    Return one keyset page plus the cursors for the neighbouring pages.
+
+    Returns:
+        tuple: (rows, prev_cursor, next_cursor); a cursor is None at either end
+    """
+    page = KeysetPage(sort, order, cursor, direction, page_size, columns)
+    rows = list(page)
+    return rows, page.prev_cursor, page.next_cursor
+
+
+def count_books():
+    """Return the total number of books."""
+    conn = get_read_connection()
+    return conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+
+
+# Columns written by the catalogue export, in file order
+EXPORT_COLUMNS = [
+    "id", "published_date", "title", "hepburn", "author",
+    "release", "url", "summary", "category_id", "category_name",
+]
+
+
+def iter_books_export(category_id=None, date_from=None, date_to=None):
     """
-    books = conn.execute(query).fetchall()
-    conn.close()
-    return books
+    Yield every book (with category name) for export, one row at a time.
+
+    The rows are read straight from the SQLite cursor instead of
+    `fetchall()`, so memory stays flat however large the catalogue is.
+
+    Args:
+        category_id: Only books in this category
+        date_from:   Only books published on or after this ISO date
+        date_to:     Only books published on or before this ISO date
+    """
+    filters = []
+    params = []
+    if category_id is not None:
+        filters.append("b.category_id = ?")
+        params.append(category_id)
+    if date_from:
+        filters.append("b.published_date >= ?")
+        params.append(date_from)
+    if date_to:
+        filters.append("b.published_date <= ?")
+        params.append(date_to)
+    where = "WHERE " + " AND ".join(filters) if filters else ""
+
+    conn = get_read_connection()
+    cursor = conn.execute(
+        f"""
+        SELECT b.id, b.published_date, b.title, b.hepburn, b.author,
+               b.release, b.url, b.summary, b.category_id
+        FROM books b
+        {where}
+        ORDER BY b.id
+        """,
+        params,
+    )
+    cursor.arraysize = 500
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            break
+        yield from with_category_names(rows)
 
 
 def get_book(id):
     """Return a single book with category name."""
-    conn = get_db_connection()
+    conn = get_read_connection()
     query = """
-        SELECT b.*, c.name AS category_name
+        SELECT b.*
         FROM books b
-        LEFT JOIN categories c ON b.category_id = c.id
         WHERE b.id = ?
     """
     book = conn.execute(query, (id,)).fetchone()
-    conn.close()
-    return book
+    return with_category_names([book])[0] if book else None
 
 
 def get_categories():
-    """Return all categories for dropdowns."""
-    conn = get_db_connection()
-    categories = conn.execute(
-        "SELECT id, name FROM categories ORDER BY name"
-    ).fetchall()
-    conn.close()
-    return categories
+    """Return all categories for dropdowns (from the per-process category cache)."""
+    return get_categories_sorted()
+
+
+# ---------------------------
+# Bulk Writes
+# ---------------------------
+# Run on the writer's connection (see core/writer.py). Ids are passed as one
+# JSON array, so a single set-based statement handles any number of them
+# without hitting SQLite's bound-parameter limit.
+
+# Columns a bulk edit may set (category changes go through move_books)
+BULK_EDIT_FIELDS = ("published_date", "title", "hepburn", "author", "release", "url", "summary")
+
+
+def delete_books(conn, ids):
+    """Delete the books in `ids`; returns how many existed."""
+    return conn.execute(
+        "DELETE FROM books WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),)
+    ).rowcount
+
+
+def move_books(conn, ids, category_id):
+    """Put the books in `ids` into `category_id`; returns how many were found."""
+    return conn.execute(
+        "UPDATE books SET category_id = ? WHERE id IN (SELECT value FROM json_each(?))",
+        (category_id, json.dumps(ids)),
+    ).rowcount
+
+
+def update_books_field(conn, ids, field, value):
+    """Set one column (from BULK_EDIT_FIELDS) of the books in `ids`; returns how many were found."""
+    if field not in BULK_EDIT_FIELDS:
+        raise ValueError(f"Field {field!r} cannot be bulk-edited")
+    return conn.execute(
+        f"UPDATE books SET {field} = ? WHERE id IN (SELECT value FROM json_each(?))",
+        (value, json.dumps(ids)),
+    ).rowcount
+
+
+# Columns the DataTables endpoint may sort by (client column index -> SQL).
+# Only these expressions are ever interpolated into ORDER BY.
+BOOK_SORT_COLUMNS = {
+    0: "b.id",
+    1: "b.title",
+    2: "b.author",
+    3: "b.published_date",
+    4: "c.name",
+}
+
+
+def get_books_page(start=0, length=10, search="", order=None):
+    """
+    Return one page of books for the DataTables server-side endpoint.
+
+    Paging, sorting and filtering all happen in SQL, and only the columns
+    shown in the list are selected (no `summary`). Category names come from
+    the category cache; `categories` is only joined to sort by name.
+
+    Args:
+        start:  Row offset of the page
+        length: Page size
+        search: Free-text filter matched against title, hepburn, author and category
+        order:  List of (column_index, "asc"|"desc") pairs, see BOOK_SORT_COLUMNS
+
+    Returns:
+        tuple: (records_total, records_filtered, rows)
+    """
+    conn = get_read_connection()
+
+    where = ""
+    params = []
+    if search:
+        like = f"%{search}%"
+        conditions = ["b.title LIKE ?", "b.hepburn LIKE ?", "b.author LIKE ?"]
+        params = [like, like, like]
+
+        # Category names are matched in memory, then filtered by id
+        needle = search.lower()
+        category_ids = [id for id, name in get_category_names().items() if needle in name.lower()]
+        if category_ids:
+            conditions.append(f"b.category_id IN ({', '.join('?' * len(category_ids))})")
+            params += category_ids
+        where = "WHERE " + " OR ".join(conditions)
+
+    order_by = []
+    join = ""
+    for column, direction in order or []:
+        expr = BOOK_SORT_COLUMNS.get(column)
+        if expr:
+            order_by.append(f"{expr} {'ASC' if direction == 'asc' else 'DESC'}")
+            if expr.startswith("c."):
+                join = "LEFT JOIN categories c ON b.category_id = c.id"
+    order_by.append("b.id DESC")  # Stable tie-breaker
+
+    records_total = conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+    if where:
+        records_filtered = conn.execute(
+            f"""
+            SELECT COUNT(*)
+            FROM books b
+            {where}
+            """,
+            params,
+        ).fetchone()[0]
+    else:
+        records_filtered = records_total
+
+    rows = with_category_names(conn.execute(
+        f"""
+        SELECT b.id, b.title, b.author, b.published_date, b.category_id
+        FROM books b
+        {join}
+        {where}
+        ORDER BY {", ".join(order_by)}
+        LIMIT ? OFFSET ?
+        """,
+        params + [length, start],
+    ))
+
+    return records_total, records_filtered, rows
+
+
+# Markers passed to snippet(); swapped for <mark> after the text is escaped
+_HL_OPEN, _HL_CLOSE = "\x02", "\x03"
+
+
+def build_fts_query(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Each word is quoted (so FTS syntax in user input is never interpreted)
+    and all words must match; the last word also matches as a prefix.
+    """
+    terms = ['"' + word.replace('"', '""') + '"' for word in text.split()]
+    if not terms:
+        return None
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_books(text, page=1, per_page=20):
+    """
+    Full-text search over title, hepburn, author and summary (books_fts).
+
+    Results are ranked by bm25 and carry highlighted title and summary
+    snippets (HTML-safe `Markup`).
+
+    Returns:
+        tuple: (total_matches, results) where results is a list of dicts
+    """
+    match = build_fts_query(text)
+    if match is None:
+        return 0, []
+
+    conn = get_read_connection()
+    total = conn.execute(
+        "SELECT COUNT(*) FROM books_fts WHERE books_fts MATCH ?", (match,)
+    ).fetchone()[0]
+
+    rows = conn.execute(
+        """
+        SELECT b.id, b.published_date, b.author, b.category_id,
+               highlight(books_fts, 0, ?, ?) AS title_hl,
+               snippet(books_fts, 3, ?, ?, '…', 16) AS summary_hl
+        FROM books_fts
+        JOIN books b ON b.id = books_fts.rowid
+        WHERE books_fts MATCH ?
+        ORDER BY bm25(books_fts)
+        LIMIT ? OFFSET ?
+        """,
+        (_HL_OPEN, _HL_CLOSE, _HL_OPEN, _HL_CLOSE, match, per_page, (page - 1) * per_page),
+    )
+
+    results = with_category_names(rows)
+    for result in results:
+        result["title_hl"] = _highlight(result["title_hl"])
+        result["summary_hl"] = _highlight(result["summary_hl"])
+    return total, results
+
+
+def _highlight(text):
+    """Escape a snippet, then turn the highlight markers into <mark> tags."""
+    safe = str(escape(text or ""))
+    return Markup(safe.replace(_HL_OPEN, "<mark>").replace(_HL_CLOSE, "</mark>"))
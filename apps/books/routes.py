@@ -1,9 +1,18 @@
+import datetime
 import sqlite3
 from functools import wraps
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, session, abort
-from .models import get_all_books, get_book, get_categories
-from core.extensions import get_db_connection  # DB connection helper coming from core/extensions.py
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, session, abort, jsonify, Response, stream_with_context, stream_template
+from .models import (
+    get_book, get_categories, get_books_page,
+    KeysetPage, count_books, decode_cursor, BOOK_SORT_KEYS,
+    search_books, iter_books_export,
+    BULK_EDIT_FIELDS, delete_books, move_books, update_books_field,
+)
+from .export import EXPORT_FORMATS
 from core.auth import admin_required # Decorator @admin_required coming from core/auth.py
+from core.cache import cached_page, bump_generation # Rendered-page cache coming from core/cache.py
+from core.writer import run_write # Single database writer coming from core/writer.py
+from apps.categories.models import get_category_cache # Cached category lookups
 
 books_bp = Blueprint(
     "books",
@@ -12,28 +21,173 @@ books_bp = Blueprint(
 )
 
 
+def is_iso_date(value):
+    """Return True if `value` is a date written as YYYY-MM-DD."""
+    try:
+        return datetime.date.fromisoformat(value).isoformat() == value
+    except (TypeError, ValueError):
+        return False
+
+
 # ---------------------------
 # List Books
 # ---------------------------
+# Page size shared by the keyset links and DataTables' first page
+LIST_PAGE_SIZE = 10
+LIST_MAX_PAGE_SIZE = 1000  # Largest ?size= accepted by the keyset links
+
 @books_bp.route("/")
+@cached_page(query_args=("sort", "order", "cursor", "dir", "size"))
 def list():
-    books = get_all_books()
-    return render_template("books/list.html", items=books)
+    """
+    Render the books list.
+
+    The first page is rendered server-side with keyset pagination
+    (?sort=&order=&cursor=&dir=&size=), so the template has plain
+    next/previous links. DataTables then takes over in server-side mode via
+    books.data, reusing the rendered rows as its first page (deferLoading).
+
+    The page is streamed: the head and table header go out at once, and
+    rows are rendered as they are read from the DB cursor.
+    """
+    sort = request.args.get("sort", "published_date")
+    if sort not in BOOK_SORT_KEYS:
+        sort = "published_date"
+    order = "asc" if request.args.get("order") == "asc" else "desc"
+    direction = "prev" if request.args.get("dir") == "prev" else "next"
+
+    cursor = None
+    if request.args.get("cursor"):
+        cursor = decode_cursor(request.args["cursor"])
+
+    page_size = request.args.get("size", LIST_PAGE_SIZE, type=int)
+    page_size = min(max(page_size, 1), LIST_MAX_PAGE_SIZE)
+
+    return stream_template(
+        "books/list.html",
+        page=KeysetPage(sort, order, cursor, direction, page_size),
+        sort=sort,
+        order=order,
+        size=page_size if page_size != LIST_PAGE_SIZE else None,  # Kept in the keyset links
+        total=count_books,  # Counted when the template needs it, after the rows
+        page_size=page_size,
+        categories=get_categories(),  # Bulk "move to category" choices
+        bulk_fields=BULK_EDIT_FIELDS,
+    )
 
 # ---------------------------
-# List Books
+# Books Data (DataTables server-side endpoint)
+# ---------------------------
+@books_bp.route("/data")
+def data():
+    """
+    JSON endpoint for DataTables' server-side processing protocol.
+
+    Reads draw, start, length, search[value] and order[i][column|dir]
+    from the query string and returns one page of rows.
+
+    Not page-cached: every DataTables request carries a fresh `draw` counter
+    (echoed back in the body) and an `_=` timestamp, so entries would never
+    be hit again.
+    """
+    args = request.args
+    draw = args.get("draw", 0, type=int)
+    start = max(args.get("start", 0, type=int), 0)
+    length = args.get("length", 10, type=int)
+    if length < 1 or length > 100:
+        length = 100  # "-1" (show all) and oversized pages are capped
+    search = args.get("search[value]", "").strip()
+
+    order = []
+    i = 0
+    while f"order[{i}][column]" in args:
+        order.append((
+            args.get(f"order[{i}][column]", type=int),
+            args.get(f"order[{i}][dir]", "asc"),
+        ))
+        i += 1
+
+    records_total, records_filtered, rows = get_books_page(start, length, search, order)
+
+    return jsonify({
+        "draw": draw,
+        "recordsTotal": records_total,
+        "recordsFiltered": records_filtered,
+        "data": rows,
+    })
+
 # ---------------------------
-#@books_bp.route("/")
-#def list():
-#    books = get_all_books()
-    # Sort books by published_date from latest to oldest
-#    books_sorted = sorted(books, key=lambda b: b['published_date'], reverse=True)
-#    return render_template("books/list.html", items=books_sorted)	
-		
+# Search Books (FTS5)
+# ---------------------------
+SEARCH_PAGE_SIZE = 20
+
+@books_bp.route("/search")
+def search():
+    """
+    Full-text search over title, hepburn, author and summary.
+
+    Query string:
+        q    : Search text
+        page : 1-based results page
+    """
+    q = request.args.get("q", "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
+
+    total, results = search_books(q, page, SEARCH_PAGE_SIZE) if q else (0, [])
+    pages = (total + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE
+
+    return render_template(
+        "books/search.html",
+        title="Search Books",
+        q=q,
+        results=results,
+        total=total,
+        page=page,
+        pages=pages,
+    )
+
+# ---------------------------
+# Export Books (CSV / JSONL / XLSX)
+# ---------------------------
+@books_bp.route("/export.<fmt>")
+def export(fmt):
+    """
+    Stream the catalogue as CSV, JSON Lines or XLSX.
+
+    Query string (all optional):
+        category : Category id to export
+        from, to : Published date range (YYYY-MM-DD, inclusive)
+    """
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+
+    category_id = request.args.get("category", type=int)
+    date_from = request.args.get("from") or None
+    date_to = request.args.get("to") or None
+    for value in (date_from, date_to):
+        if value:
+            try:
+                datetime.date.fromisoformat(value)
+            except ValueError:
+                abort(400)
+
+    writer, mimetype = EXPORT_FORMATS[fmt]
+    rows = iter_books_export(category_id, date_from, date_to)
+
+    # stream_with_context keeps the request context (g, session) available
+    # while the generator runs; the pooled connection stays checked out
+    # until the response is closed (see hand_over_to_stream in core/extensions.py)
+    return Response(
+        stream_with_context(writer(rows)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=books.{fmt}"},
+    )
+
 # ---------------------------
 # View Book
 # ---------------------------
 @books_bp.route("/view/<int:id>")
+@cached_page
 def view(id):
     book = get_book(id)
 
@@ -52,7 +206,7 @@ def add():
     categories = get_categories()
 
     if request.method == "POST":
-        published_date = request.form.get("published_date")
+        published_date = request.form.get("published_date", "").strip()
         title = request.form.get("title", "").strip()
         hepburn = request.form.get("hepburn", "").strip()
         author = request.form.get("author", "").strip()
@@ -64,10 +218,11 @@ def add():
         # Minimal validation
         if not title or not hepburn or not author or not release or not url:
             flash("All required fields must be filled.", "error")
+        elif not is_iso_date(published_date):
+            flash("Published date must be YYYY-MM-DD.", "error")
         else:
-            db_path = current_app.config["DATABASE"]
-
-            with sqlite3.connect(db_path, timeout=5) as conn:
+            # Runs on the writer thread, committed together with nearby writes
+            def insert(conn):
                 conn.execute(
                     """
                     INSERT INTO books (
@@ -93,6 +248,9 @@ def add():
                         category_id
                     )
                 )
+                bump_generation(conn)
+
+            run_write(insert)
 
             flash("Book added successfully.", "success")
             return redirect(url_for("books.list"))
@@ -127,7 +285,7 @@ def edit(id):
         # ---------------------------
         title = request.form.get("title", "").strip()
         author = request.form.get("author", "").strip()
-        published_date = request.form.get("published_date")
+        published_date = request.form.get("published_date", "").strip()
         hepburn = request.form.get("hepburn", "").strip()
         release = request.form.get("release", "").strip()
         url = request.form.get("url", "").strip()
@@ -139,22 +297,25 @@ def edit(id):
         # ---------------------------
         if not title:
             flash("Title is required.", "error")
+        elif not is_iso_date(published_date):
+            flash("Published date must be YYYY-MM-DD.", "error")
         else:
             # ---------------------------
             # Update the book in the database
             # ---------------------------
-            conn = get_db_connection()
-            conn.execute(
-                """
-                UPDATE books
-                SET title = ?, author = ?, published_date = ?, hepburn = ?,
-                    release = ?, url = ?, summary = ?, category_id = ?
-                WHERE id = ?
-                """,
-                (title, author, published_date, hepburn, release, url, summary, category_id, id)
-            )
-            conn.commit()
-            conn.close()
+            def update(conn):
+                conn.execute(
+                    """
+                    UPDATE books
+                    SET title = ?, author = ?, published_date = ?, hepburn = ?,
+                        release = ?, url = ?, summary = ?, category_id = ?
+                    WHERE id = ?
+                    """,
+                    (title, author, published_date, hepburn, release, url, summary, category_id, id)
+                )
+                bump_generation(conn)
+
+            run_write(update)
 
             # Notify success and redirect to the list
             flash("Book updated successfully.", "success")
@@ -177,9 +338,99 @@ def edit(id):
 @books_bp.route("/delete/<int:id>", methods=["POST"])
 @admin_required
 def delete(id):
-    conn = get_db_connection()
-    conn.execute("DELETE FROM books WHERE id = ?", (id,))
-    conn.commit()
-    conn.close()
+    def remove(conn):
+        conn.execute("DELETE FROM books WHERE id = ?", (id,))
+        bump_generation(conn)
+
+    run_write(remove)
     flash("Book deleted successfully.", "success")
     return redirect(url_for("books.list"))
+
+
+# ---------------------------
+# Bulk Actions (Admin Only)
+# ---------------------------
+BULK_MAX_IDS = 10000  # Largest selection accepted in one request
+
+# Fields a book can't be saved without (summary may be empty)
+BULK_REQUIRED_FIELDS = ("published_date", "title", "hepburn", "author", "release", "url")
+
+
+def parse_ids(values):
+    """Return the unique positive ids from repeated and/or comma-separated form values."""
+    ids = []
+    for value in values:
+        for part in value.split(","):
+            part = part.strip()
+            if part.isdigit() and int(part) > 0:
+                ids.append(int(part))
+    return sorted(set(ids))  # (`list` is the view above)
+
+
+@books_bp.route("/bulk", methods=["POST"])
+@admin_required
+def bulk():
+    """
+    Apply one action to many books in a single transaction.
+
+    Form fields:
+        ids         : Book ids (repeated and/or comma-separated)
+        action      : "delete", "move" or "edit"
+        category_id : Target category (move)
+        field/value : Column from BULK_EDIT_FIELDS and its new value (edit)
+    """
+    ids = parse_ids(request.form.getlist("ids"))
+    action = request.form.get("action")
+
+    if not ids:
+        flash("Select at least one book.", "error")
+        return redirect(url_for("books.list"))
+    if len(ids) > BULK_MAX_IDS:
+        flash(f"At most {BULK_MAX_IDS} books can be changed at once.", "error")
+        return redirect(url_for("books.list"))
+
+    if action == "delete":
+        def apply(conn):
+            return delete_books(conn, ids)
+        done = "deleted"
+
+    elif action == "move":
+        category_id = request.form.get("category_id", type=int)
+        category = get_category_cache().by_id.get(category_id)
+        if category is None:
+            flash("Choose an existing category.", "error")
+            return redirect(url_for("books.list"))
+
+        def apply(conn):
+            return move_books(conn, ids, category_id)
+        done = f"moved to {category['name']}"
+
+    elif action == "edit":
+        field = request.form.get("field")
+        value = request.form.get("value", "").strip()
+        if field not in BULK_EDIT_FIELDS:
+            flash("Choose a field to edit.", "error")
+            return redirect(url_for("books.list"))
+        if field in BULK_REQUIRED_FIELDS and not value:
+            flash(f"{field} cannot be empty.", "error")
+            return redirect(url_for("books.list"))
+        if field == "published_date" and not is_iso_date(value):
+            flash("published_date must be YYYY-MM-DD.", "error")
+            return redirect(url_for("books.list"))
+
+        def apply(conn):
+            return update_books_field(conn, ids, field, value)
+        done = "updated"
+
+    else:
+        abort(400)
+
+    def run(conn):
+        count = apply(conn)
+        if count:
+            bump_generation(conn)
+        return count
+
+    count = run_write(run)
+    flash(f"{count} book(s) {done}.", "success")
+    return redirect(url_for("books.list"))
@@ -0,0 +1,91 @@
+import threading
+
+from flask import current_app, g
+
+from core.extensions import get_db_connection  # Shared, request-scoped DB connection
+from core.snapshot import get_read_connection  # Reads: DB file or in-memory snapshot
+
+
+# ---------------------------
+# Category Lookup Cache
+# ---------------------------
+# Categories are few and change rarely, so each process keeps them in memory
+# (by id and sorted by name). A version stamp in the database
+# (`category_version`) tells every process when to reload.
+
+class CategoryCache:
+    """In-memory copy of the categories table for one database."""
+
+    def __init__(self):
+        self.version = None
+        self.by_id = {}
+        self.sorted_by_name = []
+        self.lock = threading.Lock()
+
+    def load(self, conn, version):
+        rows = conn.execute(
+            "SELECT id, name, description FROM categories ORDER BY name"
+        ).fetchall()
+        self.sorted_by_name = [dict(row) for row in rows]
+        self.by_id = {c["id"]: c for c in self.sorted_by_name}
+        self.version = version
+
+
+def _get_version(conn):
+    """Return the categories version stamp (read once per request)."""
+    if "category_version" not in g:
+        g.category_version = conn.execute(
+            "SELECT version FROM category_version WHERE id = 1"
+        ).fetchone()[0]
+    return g.category_version
+
+
+def get_category_cache():
+    """Return the up-to-date category cache for the app's database."""
+    cache = current_app.extensions.get("category_cache")
+    if cache is None:
+        cache = current_app.extensions.setdefault("category_cache", CategoryCache())
+
+    conn = get_read_connection()
+    version = _get_version(conn)
+    if cache.version != version:
+        with cache.lock:
+            if cache.version != version:
+                cache.load(conn, version)
+    return cache
+
+
+def get_categories_sorted():
+    """Return all categories as dicts (id, name, description), sorted by name."""
+    return get_category_cache().sorted_by_name
+
+
+def get_category_names():
+    """Return a {category id: name} mapping."""
+    return {id: c["name"] for id, c in get_category_cache().by_id.items()}
+
+
+def get_category(id):
+    """Return one category row with its `book_count` (None if it doesn't exist)."""
+    return get_read_connection().execute(
+        """
+        SELECT c.*, COALESCE(n.book_count, 0) AS book_count
+        FROM categories c
+        LEFT JOIN category_book_counts n ON n.category_id = c.id
+        WHERE c.id = ?
+        """,
+        (id,)
+    ).fetchone()
+
+
+def invalidate_categories(conn=None):
+    """
+    Mark the category cache stale in every process.
+
+    Call this from every handler that writes categories, with the write's
+    connection so the bump commits in the same transaction. The version
+    stamp a request already read (on `g`) is not reset: write handlers
+    redirect, and the next request reads the new version.
+    """
+    conn = conn or get_db_connection()
+    conn.execute("UPDATE category_version SET version = version + 1 WHERE id = 1")
@@ -1,8 +1,12 @@
 import sqlite3
 from functools import wraps
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, session, abort
-from core.extensions import get_db_connection  # DB connection helper coming from core/extensions.py
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, session, abort, stream_template
+from apps.books.models import KeysetPage, decode_cursor # Keyset pagination coming from apps/books/models.py
+from core.snapshot import get_read_connection  # Read connection helper coming from core/snapshot.py
 from core.auth import admin_required # Decorator @admin_required coming from core/auth.py
+from core.cache import cached_page, bump_generation # Rendered-page cache coming from core/cache.py
+from core.writer import run_write # Single database writer coming from core/writer.py
+from .models import get_category, get_categories_sorted, invalidate_categories
 
 categories_bp = Blueprint(
     "categories",
@@ -15,26 +19,56 @@ categories_bp = Blueprint(
 # List Categories
 # ---------------------------
 @categories_bp.route("/")
+@cached_page
 def list():
-    conn = get_db_connection()
-    items = conn.execute("SELECT id, name, description FROM categories ORDER BY id DESC").fetchall()
-    conn.close()
-    return render_template("categories/list.html", items=items)
+    # Streamed: rows are rendered as they are read from the cursor.
+    # Book counts come from the trigger-maintained category_book_counts table.
+    conn = get_read_connection()
+    items = conn.execute(
+        """
+        SELECT c.id, c.name, c.description, COALESCE(n.book_count, 0) AS book_count
+        FROM categories c
+        LEFT JOIN category_book_counts n ON n.category_id = c.id
+        ORDER BY c.id DESC
+        """
+    )
+    return stream_template("categories/list.html", items=items)
 
 # ---------------------------
 # View Category
 # ---------------------------
+# Books shown per page of a category (keyset links: ?order=&cursor=&dir=)
+VIEW_PAGE_SIZE = 20
+
 @categories_bp.route("/view/<int:id>")
+@cached_page(query_args=("order", "cursor", "dir"))
 def view(id):
-    conn = get_db_connection()
-    category = conn.execute("SELECT * FROM categories WHERE id = ?", (id,)).fetchone()
-    conn.close()
+    category = get_category(id)
 
     if category is None:
         flash("Category not found.", "error")
         return redirect(url_for("categories.list"))
 
-    return render_template("categories/view.html", category=category, title="Category Details")
+    # The category's books by publication date, seeking the
+    # (category_id, published_date, id) index one page at a time
+    order = "asc" if request.args.get("order") == "asc" else "desc"
+    direction = "prev" if request.args.get("dir") == "prev" else "next"
+    cursor = None
+    if request.args.get("cursor"):
+        cursor = decode_cursor(request.args["cursor"])
+
+    books = KeysetPage(
+        "published_date", order, cursor, direction, VIEW_PAGE_SIZE,
+        columns=("id", "title", "author", "published_date"), category_id=id,
+    )
+    return render_template(
+        "categories/view.html",
+        category=category,
+        books=books,
+        order=order,
+        categories=get_categories_sorted(),  # "Merge into" choices
+        title="Category Details",
+    )
 
 # ---------------------------
 # Add Category (Admin Only)
@@ -49,10 +83,12 @@ def add():
         if not name:
             flash("Name is required.", "error")
         else:
-            conn = get_db_connection()
-            conn.execute("INSERT INTO categories (name, description) VALUES (?, ?)", (name, description))
-            conn.commit()
-            conn.close()
+            def insert(conn):
+                conn.execute("INSERT INTO categories (name, description) VALUES (?, ?)", (name, description))
+                invalidate_categories(conn)
+                bump_generation(conn)
+
+            run_write(insert)
             flash("Category added successfully.", "success")
             return redirect(url_for("categories.list"))
 
@@ -65,11 +101,10 @@ def add():
 @categories_bp.route("/edit/<int:id>", methods=["GET", "POST"])
 @admin_required  # Only admin can edit categories
 def edit(id):
-    conn = get_db_connection()
+    conn = get_read_connection()
     category = conn.execute("SELECT * FROM categories WHERE id = ?", (id,)).fetchone()
 
     if category is None:
-        conn.close()
         flash("Category not found.", "error")
         return redirect(url_for("categories.list"))
 
@@ -80,13 +115,15 @@ def edit(id):
         if not name:
             flash("Name is required.", "error")
         else:
-            conn.execute("UPDATE categories SET name = ?, description = ? WHERE id = ?", (name, description, id))
-            conn.commit()
-            conn.close()
+            def update(conn):
+                conn.execute("UPDATE categories SET name = ?, description = ? WHERE id = ?", (name, description, id))
+                invalidate_categories(conn)
+                bump_generation(conn)
+
+            run_write(update)
             flash("Category updated successfully.", "success")
             return redirect(url_for("categories.list"))
 
-    conn.close()
     return render_template("categories/form.html", title="Edit Category", category=category)
 
 # ---------------------------
@@ -95,21 +132,79 @@ def edit(id):
 @categories_bp.route("/delete/<int:id>", methods=["POST", "GET"])
 @admin_required  # <-- Only admin can delete categories
 def delete(id):
-    conn = get_db_connection()
-    category = conn.execute("SELECT * FROM categories WHERE id = ?", (id,)).fetchone()
+    category = get_category(id)
 
     if category is None:
-        conn.close()
         flash("Category not found.", "error")
         return redirect(url_for("categories.list"))
 
     if request.method == "POST":
-        conn.execute("DELETE FROM categories WHERE id = ?", (id,))
-        conn.commit()
-        conn.close()
+        # The books FK isn't enforced, so refuse instead of orphaning books;
+        # checked inside the write so a concurrent add can't slip in
+        def remove(conn):
+            if conn.execute("SELECT 1 FROM books WHERE category_id = ? LIMIT 1", (id,)).fetchone():
+                return False
+            conn.execute("DELETE FROM categories WHERE id = ?", (id,))
+            invalidate_categories(conn)
+            bump_generation(conn)
+            return True
+
+        if not run_write(remove):
+            flash("This category still has books. Merge it into another category instead.", "error")
+            return redirect(url_for("categories.view", id=id))
         flash("Category deleted successfully.", "success")
         return redirect(url_for("categories.list"))
 
-    conn.close()
     # For GET request, we could render a simple confirmation template
-    return render_template("categories/view.html", category=category, title="Delete Category")
+    return render_template(
+        "categories/view.html",
+        category=category,
+        categories=get_categories_sorted(),
+        title="Delete Category",
+    )
+
+# ---------------------------
+# Merge Category (Admin Only)
+# ---------------------------
+@categories_bp.route("/merge/<int:id>", methods=["POST"])
+@admin_required
+def merge(id):
+    """
+    Move every book of category `id` into category `into`, then delete `id`.
+
+    One set-based UPDATE re-points the books in the same transaction as the
+    delete, so no book is ever left pointing at a missing category.
+    """
+    category = get_category(id)
+    if category is None:
+        flash("Category not found.", "error")
+        return redirect(url_for("categories.list"))
+
+    into = request.form.get("into", type=int)
+    target = get_category(into) if into is not None and into != id else None
+    if target is None:
+        flash("Choose another existing category to merge into.", "error")
+        return redirect(url_for("categories.view", id=id))
+
+    # Both categories are checked again inside the write: either may have
+    # been deleted since the (possibly snapshot) reads above
+    def apply(conn):
+        found = conn.execute(
+            "SELECT COUNT(*) FROM categories WHERE id IN (?, ?)", (id, into)
+        ).fetchone()[0]
+        if found != 2:
+            return None
+        moved = conn.execute(
+            "UPDATE books SET category_id = ? WHERE category_id = ?", (into, id)
+        ).rowcount
+        conn.execute("DELETE FROM categories WHERE id = ?", (id,))
+        invalidate_categories(conn)
+        bump_generation(conn)
+        return moved
+
+    moved = run_write(apply)
+    if moved is None:
+        flash("One of the categories no longer exists; nothing was merged.", "error")
+        return redirect(url_for("categories.list"))
+    flash(f"Merged {category['name']} into {target['name']} ({moved} book(s) moved).", "success")
+    return redirect(url_for("categories.view", id=into))
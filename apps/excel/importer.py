@@ -0,0 +1,239 @@
+import csv
+import datetime
+import os
+from zipfile import BadZipFile
+
+from core.cache import bump_generation  # Invalidates cached book/category pages
+from core.writer import run_write  # Single database writer (one transaction per chunk)
+from apps.categories.models import get_categories_sorted  # Cached category lookups
+
+
+# ---------------------------
+# Import fields
+# ---------------------------
+# Target fields an uploaded column can be mapped onto, in form order.
+# "category" is a category *name*, resolved to categories.id.
+IMPORT_FIELDS = [
+    "published_date",
+    "title",
+    "hepburn",
+    "author",
+    "release",
+    "url",
+    "summary",
+    "category",
+]
+REQUIRED_FIELDS = {"published_date", "title", "hepburn", "author", "release", "url", "category"}
+
+ALLOWED_EXTENSIONS = {".xlsx", ".csv"}
+CHUNK_SIZE = 500  # Rows per executemany / transaction
+
+INSERT_SQL = """
+    INSERT INTO books (
+        published_date, title, hepburn, author, release, url, summary, category_id
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# ---------------------------
+# Reading uploaded files
+# ---------------------------
+class ImportFileError(Exception):
+    """The uploaded file can't be read as an .xlsx workbook or a UTF-8 .csv."""
+
+
+def iter_rows(path):
+    """
+    Yield every row of an .xlsx (first sheet) or .csv file as a list.
+
+    Both readers stream, so large files are never loaded whole.
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.reader(f)
+        return
+
+    from openpyxl import load_workbook  # Deferred: keeps openpyxl out of worker startup
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in wb.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        wb.close()
+
+
+def read_headers(path):
+    """
+    Return the first row of the file as column labels.
+
+    The whole file is read once (streaming), so a corrupt workbook or a CSV
+    that isn't UTF-8 is rejected at upload instead of halfway through an
+    import whose first chunks are already committed.
+
+    Raises:
+        ImportFileError: if any part of the file can't be read
+    """
+    unreadable = (BadZipFile, KeyError, UnicodeDecodeError, csv.Error)
+    if not path.lower().endswith(".csv"):
+        from openpyxl.utils.exceptions import InvalidFileException
+        unreadable += (InvalidFileException,)
+
+    headers = None
+    try:
+        for row in iter_rows(path):
+            if headers is None:
+                headers = ["" if cell is None else str(cell).strip() for cell in row]
+    except unreadable as e:
+        if isinstance(e, UnicodeDecodeError):
+            raise ImportFileError("The CSV file is not UTF-8 encoded.") from e
+        raise ImportFileError("The file could not be read. Is it a valid .xlsx or .csv file?") from e
+    return headers or []
+
+
+# Header names recognised by guess_mapping() (besides the field name itself)
+HEADER_ALIASES = {
+    "category": ["category_name"],
+    "published_date": ["published", "date"],
+}
+
+
+def guess_mapping(headers):
+    """Map each import field to the column whose header matches its name."""
+    normalized = [h.lower().replace(" ", "_") for h in headers]
+    mapping = {}
+    for field in IMPORT_FIELDS:
+        for name in [field] + HEADER_ALIASES.get(field, []):
+            if name in normalized:
+                mapping[field] = normalized.index(name)
+                break
+    return mapping
+
+
+# ---------------------------
+# Validation
+# ---------------------------
+def _as_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _as_date(value):
+    """Return an ISO date string, or raise ValueError."""
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return datetime.date.fromisoformat(_as_text(value)).isoformat()
+
+
+def validate_row(row, mapping, category_ids):
+    """
+    Validate one source row.
+
+    Returns:
+        tuple: (params, None) ready for INSERT_SQL, or (None, error message)
+    """
+    values = {}
+    for field in IMPORT_FIELDS:
+        index = mapping.get(field)
+        values[field] = row[index] if index is not None and index < len(row) else None
+
+    missing = [f for f in IMPORT_FIELDS if f in REQUIRED_FIELDS and _as_text(values[f]) == ""]
+    if missing:
+        return None, "Missing " + ", ".join(missing)
+
+    try:
+        published_date = _as_date(values["published_date"])
+    except ValueError:
+        return None, f"Invalid published_date {_as_text(values['published_date'])!r} (expected YYYY-MM-DD)"
+
+    category_name = _as_text(values["category"])
+    category_id = category_ids.get(category_name.lower())
+    if category_id is None:
+        return None, f"Unknown category {category_name!r}"
+
+    return (
+        published_date,
+        _as_text(values["title"]),
+        _as_text(values["hepburn"]),
+        _as_text(values["author"]),
+        _as_text(values["release"]),
+        _as_text(values["url"]),
+        _as_text(values["summary"]),
+        category_id,
+    ), None
+
+
+# ---------------------------
+# Import
+# ---------------------------
+def import_books(path, mapping, chunk_size=CHUNK_SIZE):
+    """
+    Import books from `path` using `mapping` (field -> column index).
+
+    Valid rows are inserted with `executemany`, one write job per chunk
+    (see core/writer.py), so a failure only rolls back the chunk it happened
+    in. Category names are resolved through one lookup map built from the
+    category cache.
+
+    Yields:
+        dict: A progress event after each chunk:
+              {"rows": rows read, "inserted": rows inserted so far,
+               "errors": [(row number, message), ...] found in that chunk}
+    """
+    category_ids = {
+        category["name"].strip().lower(): category["id"]
+        for category in get_categories_sorted()
+    }
+
+    rows_read = 0
+    inserted = 0
+    batch = []
+    errors = []
+
+    def flush():
+        nonlocal inserted
+        if batch:
+            def insert(conn):
+                conn.executemany(INSERT_SQL, batch)
+                bump_generation(conn)
+
+            run_write(insert)
+            inserted += len(batch)
+        event = {"rows": rows_read, "inserted": inserted, "errors": list(errors)}
+        batch.clear()
+        errors.clear()
+        return event
+
+    rows = iter_rows(path)
+    next(rows, None)  # Skip the header row
+
+    for row_number, row in enumerate(rows, start=2):
+        if all(_as_text(cell) == "" for cell in row):
+            continue  # Ignore blank lines
+
+        rows_read += 1
+        params, error = validate_row(row, mapping, category_ids)
+        if error:
+            errors.append((row_number, error))
+        else:
+            batch.append(params)
+
+        if rows_read % chunk_size == 0:
+            yield flush()
+
+    if rows_read % chunk_size or rows_read == 0:
+        yield flush()
+
+
+def remove_upload(path):
+    """Delete a staged import file, ignoring files that are already gone."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -1,7 +1,14 @@
 import os
-from flask import Blueprint, request, render_template, redirect, url_for, flash
-import pandas as pd
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from flask import Blueprint, request, render_template, redirect, url_for, flash, stream_template
 from core.auth import admin_required # Decorator @admin_required coming from core/auth.py
+from .importer import (
+    IMPORT_FIELDS, REQUIRED_FIELDS, ALLOWED_EXTENSIONS,
+    ImportFileError, read_headers, guess_mapping, import_books, remove_upload,
+)
 
 # Define a Blueprint for the module
 excel_bp = Blueprint(
@@ -26,6 +33,78 @@ UPLOAD_FOLDER = 'uploads/'
 EXCEL_FILE = os.path.join(UPLOAD_FOLDER, 'excel.xlsx')  # File path for excel.xlsx
 
 
+# ---------------------------
+# Preview size and cache
+# ---------------------------
+PREVIEW_ROWS = 10
+PREVIEW_COLS = 6
+PREVIEW_CACHE_SIZE = 8  # Max cached previews per process (LRU)
+
+_preview_cache = OrderedDict()
+_preview_lock = threading.Lock()
+
+
+def read_preview(path, max_rows=PREVIEW_ROWS, max_cols=PREVIEW_COLS):
+    """
+    Return the top-left corner of the first sheet as a list of rows.
+
+    Uses openpyxl's streaming read-only mode, which stops after `max_rows`
+    rows and `max_cols` columns instead of parsing the whole workbook.
+    Formula cells show their last calculated value (`data_only=True`).
+    """
+    from openpyxl import load_workbook  # Deferred: only this page needs openpyxl
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        rows = [
+            ["" if cell is None else cell for cell in row]
+            for row in ws.iter_rows(max_row=max_rows, max_col=max_cols, values_only=True)
+        ]
+    finally:
+        wb.close()
+
+    # Drop trailing columns that are empty in every previewed row
+    width = max(
+        (i + 1 for row in rows for i, cell in enumerate(row) if cell != ""),
+        default=0,
+    )
+    return [row[:width] for row in rows]
+
+
+def get_preview(path):
+    """
+    Return the cached preview for `path`, reading it only when the file changes.
+
+    The cache key is (path, mtime, size), so a replaced file is re-read on
+    the next view. Returns None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    with _preview_lock:
+        if key in _preview_cache:
+            _preview_cache.move_to_end(key)
+            return _preview_cache[key]
+
+    preview = read_preview(path)
+
+    with _preview_lock:
+        _preview_cache[key] = preview
+        while len(_preview_cache) > PREVIEW_CACHE_SIZE:
+            _preview_cache.popitem(last=False)
+    return preview
+
+
+def clear_preview_cache():
+    """Forget every cached preview (called after an upload)."""
+    with _preview_lock:
+        _preview_cache.clear()
+
+
 # ---------------------------
 # Route for the Blueprint View
 # ---------------------------
@@ -47,17 +126,12 @@ def list():
         return _handle_upload()  # Delegate to separate function
 
     # ---------------------------
-    # Display existing Excel file
+    # Display existing Excel file (cached until the file changes)
     # ---------------------------
-    if os.path.exists(EXCEL_FILE):
-        df = pd.read_excel(EXCEL_FILE, header=None)
-
-        # Slice the DataFrame: first 10 rows, first 6 columns
-        df = df.iloc[:10, :6]
-
+    excel_data = get_preview(EXCEL_FILE)
+    if excel_data:
         # Generate generic column names (Col 1, Col 2, ...)
-        excel_columns = [f"Col {i+1}" for i in range(df.shape[1])]
-        excel_data = df.values.tolist()
+        excel_columns = [f"Col {i+1}" for i in range(len(excel_data[0]))]
 
     # Render the template and pass the data
     return render_template("excel/list.html", excel_columns=excel_columns, excel_data=excel_data)
@@ -76,8 +150,97 @@ def _handle_upload():
     if file and file.filename == 'excel.xlsx':
         # Save the uploaded file
         file.save(EXCEL_FILE)
+        clear_preview_cache()
         flash("File uploaded successfully! Redirecting to reload the page.")  # Show a temporary message
     else:
         flash("No valid file uploaded.")
 
     return redirect(url_for('excel.list'))
+
+
+# ---------------------------
+# Import Books (Admin Only)
+# ---------------------------
+# Staged import files are saved as uploads/import-<hex>.<ext>
+IMPORT_FILE_RE = re.compile(r"^import-[0-9a-f]{32}\.(xlsx|csv)$")
+
+
+@excel_bp.route("/import", methods=["GET", "POST"])
+@admin_required
+def import_upload():
+    """
+    Step 1 of a bulk import: upload an .xlsx or .csv file.
+
+    POST saves the file under a random name and shows the column mapping
+    form, pre-filled from the header row.
+    """
+    if request.method == "POST":
+        file = request.files.get("file")
+        ext = os.path.splitext(file.filename)[1].lower() if file else ""
+
+        if not file or ext not in ALLOWED_EXTENSIONS:
+            flash("Please upload an .xlsx or .csv file.", "error")
+            return redirect(url_for("excel.import_upload"))
+
+        token = f"import-{uuid.uuid4().hex}{ext}"
+        path = os.path.join(UPLOAD_FOLDER, token)
+        file.save(path)
+
+        try:
+            headers = read_headers(path)
+        except ImportFileError as e:
+            remove_upload(path)
+            flash(str(e), "error")
+            return redirect(url_for("excel.import_upload"))
+        if not headers:
+            remove_upload(path)
+            flash("The uploaded file is empty.", "error")
+            return redirect(url_for("excel.import_upload"))
+
+        return render_template(
+            "excel/import.html",
+            title="Import Books",
+            token=token,
+            headers=headers,
+            fields=IMPORT_FIELDS,
+            required=REQUIRED_FIELDS,
+            mapping=guess_mapping(headers),
+        )
+
+    return render_template("excel/import.html", title="Import Books")
+
+
+@excel_bp.route("/import/run", methods=["POST"])
+@admin_required
+def import_run():
+    """
+    Step 2 of a bulk import: insert the rows using the submitted mapping.
+
+    The report is streamed, so progress and per-row errors appear as each
+    chunk is committed. The staged file is deleted once the import ends.
+    """
+    token = request.form.get("token", "")
+    path = os.path.join(UPLOAD_FOLDER, token)
+    if not IMPORT_FILE_RE.match(token) or not os.path.exists(path):
+        flash("Import file not found, please upload it again.", "error")
+        return redirect(url_for("excel.import_upload"))
+
+    mapping = {}
+    for field in IMPORT_FIELDS:
+        value = request.form.get(f"map_{field}", "")
+        if value.isdigit():
+            mapping[field] = int(value)
+
+    unmapped = [f for f in IMPORT_FIELDS if f in REQUIRED_FIELDS and f not in mapping]
+    if unmapped:
+        remove_upload(path)
+        flash("Every required field must be mapped: " + ", ".join(unmapped), "error")
+        return redirect(url_for("excel.import_upload"))
+
+    def progress():
+        try:
+            yield from import_books(path, mapping)
+        finally:
+            remove_upload(path)
+
+    return stream_template("excel/import_report.html", title="Import Report", progress=progress())
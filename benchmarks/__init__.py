@@ -0,0 +1,10 @@
+"""
+benchmarks/
+
+Reproducible load tests for the Flask app.
+
+    - generate.py : build a synthetic db.sqlite3 at a chosen scale
+    - run.py      : drive create_app() (test client or real WSGI server) and
+                    report p50/p95/p99 latency and requests per second,
+                    compared against a stored baseline
+"""
@@ -0,0 +1,154 @@
+"""
+benchmarks/generate.py
+
+Build a synthetic catalogue database for load testing.
+
+The real `books`, `categories` and `auth_user` schema (and the two demo
+accounts) are copied from the sample database, then filled with generated
+rows. The output is deterministic for a given --seed.
+
+Usage:
+    (venv) $ python -m benchmarks.generate --books 100000 --categories 20
+    (venv) $ python -m benchmarks.generate --books 1000000 --out benchmarks/data/1m.sqlite3
+"""
+
+import argparse
+import datetime
+import os
+import random
+import re
+import sqlite3
+import time
+
+from config import Config
+from core.schema import SCHEMA_STATEMENTS
+
+
+# Default output folder (ignored by git)
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+WORDS = (
+    "sword shadow crown kingdom dragon witch academy hero demon lord tower "
+    "moon blade empire spirit reincarnated villainess saint frontier dungeon "
+    "magic guild princess knight sage beast curse star garden winter"
+).split()
+
+BASE_TABLES = ("categories", "books", "auth_user")
+
+
+# -----------------------------
+# Schema
+# -----------------------------
+def copy_schema(source, conn):
+    """
+    Create the base tables and their original (Django) indexes from the
+    sample database, plus its users.
+
+    Triggers, the search table and the app's own indexes are left out even
+    if the app has already added them to the sample database: they are
+    created by create_app() once the rows are loaded (see build()).
+    """
+    app_objects = set(re.findall(r'IF NOT EXISTS "(\w+)"', "\n".join(SCHEMA_STATEMENTS)))
+    src = sqlite3.connect(source)
+    try:
+        rows = src.execute(
+            "SELECT type, name, sql FROM sqlite_master "
+            "WHERE type IN ('table', 'index') AND tbl_name IN (?, ?, ?) AND sql IS NOT NULL "
+            "ORDER BY type = 'index'",  # Tables before their indexes
+            BASE_TABLES,
+        ).fetchall()
+        for _, name, sql in rows:
+            if name not in app_objects:
+                conn.execute(sql)
+
+        users = src.execute("SELECT * FROM auth_user").fetchall()
+        if users:
+            placeholders = ", ".join("?" * len(users[0]))
+            conn.executemany(f"INSERT INTO auth_user VALUES ({placeholders})", users)
+    finally:
+        src.close()
+
+
+# -----------------------------
+# Rows
+# -----------------------------
+def _title(rng):
+    return " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(2, 6)))
+
+
+def generate_books(rng, count, category_count):
+    """Yield `count` book rows spread across `category_count` categories."""
+    start = datetime.date(1990, 1, 1)
+    for i in range(1, count + 1):
+        title = _title(rng)
+        yield (
+            (start + datetime.timedelta(days=rng.randint(0, 13000))).isoformat(),
+            title,
+            title.lower().replace(" ", "-"),
+            f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS).capitalize()}",
+            f"Volumes {rng.randint(1, 30)}",
+            f"https://example.com/books/{i}",
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))),
+            rng.randint(1, category_count),
+        )
+
+
+def build(out, books, categories, seed=1, source=Config.DATABASE, chunk=10000):
+    """Create the database at `out`, replacing any existing file."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(out + suffix):
+            os.remove(out + suffix)
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(out)
+    conn.execute("PRAGMA journal_mode = OFF")  # Bulk load: no rollback journal
+    conn.execute("PRAGMA synchronous = OFF")
+    try:
+        with conn:
+            copy_schema(source, conn)
+            conn.executemany(
+                "INSERT INTO categories (id, name, description) VALUES (?, ?, ?)",
+                [(i, f"Category {i}", f"Synthetic category {i}") for i in range(1, categories + 1)],
+            )
+
+            rows = generate_books(rng, books, categories)
+            while True:
+                batch = [row for _, row in zip(range(chunk), rows)]
+                if not batch:
+                    break
+                conn.executemany(
+                    "INSERT INTO books (published_date, title, hepburn, author, "
+                    "release, url, summary, category_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    # Let the app add its own indexes, search table and counters
+    from core.app_factory import create_app
+
+    class BenchConfig(Config):
+        DATABASE = os.path.abspath(out)
+
+    create_app(BenchConfig)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic catalogue database.")
+    parser.add_argument("--books", type=int, default=1000, help="number of books (default: 1000)")
+    parser.add_argument("--categories", type=int, default=10, help="number of categories (default: 10)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+    parser.add_argument("--out", help="output file (default: benchmarks/data/<books>.sqlite3)")
+    args = parser.parse_args(argv)
+
+    out = args.out or os.path.join(DATA_DIR, f"{args.books}.sqlite3")
+    started = time.perf_counter()
+    build(out, args.books, args.categories, args.seed)
+    print(f"Wrote {args.books} books in {args.categories} categories to {out} "
+          f"({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+benchmarks/run.py
+
+Load-test the app built by core.app_factory.create_app().
+
+Each scenario is requested N times (optionally from several threads) as a
+logged-in admin, and the run reports p50 / p95 / p99 latency and requests
+per second. Results can be saved as a baseline and later runs compared
+against it; a p95 regression beyond --tolerance makes the exit code 1.
+
+Modes:
+    client : Flask test client, in-process (measures the app alone)
+    wsgi   : a real threaded WSGI server on localhost, driven over HTTP
+
+Usage:
+    (venv) $ python -m benchmarks.generate --books 100000
+    (venv) $ python -m benchmarks.run --db benchmarks/data/100000.sqlite3 --save-baseline
+    (venv) $ python -m benchmarks.run --db benchmarks/data/100000.sqlite3 --mode wsgi --concurrency 8
+"""
+
+import argparse
+import http.client
+import http.cookiejar
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+ADMIN = {"username": "admin", "password": "root"}
+
+# Status recorded when an HTTP request fails below the HTTP level (>= 500: an error)
+TRANSPORT_ERROR = 599
+
+# Scenario name -> (method, path or callable(rng, max_id) -> path, form data)
+SCENARIOS = {
+    "books.list": ("GET", "/books/", None),
+    "books.view": ("GET", lambda rng, max_id: f"/books/view/{rng.randint(1, max_id)}", None),
+    "categories.list": ("GET", "/categories/", None),
+    "excel.list": ("GET", "/excel/", None),
+    "login": ("POST", "/login", ADMIN),
+}
+
+
+# -----------------------------
+# Clients
+# -----------------------------
+class TestClientDriver:
+    """Sends requests through Flask's test client (one client per thread)."""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def session(self):
+        """Return this thread's logged-in client (logs in on first use)."""
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+            client.post("/login", data=ADMIN)
+        return client
+
+    def request(self, session, method, path, data=None):
+        response = session.open(path, method=method, data=data)
+        response.close()
+        return response.status_code
+
+
+class WSGIDriver:
+    """Sends HTTP requests to a threaded WSGI server running the app."""
+
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+
+        self.server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_quiet_handler())
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.local = threading.local()
+
+    def session(self):
+        """Return this thread's logged-in opener (logs in on first use)."""
+        opener = getattr(self.local, "opener", None)
+        if opener is None:
+            jar = http.cookiejar.CookieJar()
+            opener = self.local.opener = urllib.request.build_opener(
+                urllib.request.HTTPCookieProcessor(jar), _NoRedirect()
+            )
+            self._send(opener, "POST", "/login", ADMIN)
+        return opener
+
+    def _send(self, opener, method, path, data):
+        body = urllib.parse.urlencode(data).encode() if data else None
+        req = urllib.request.Request(self.base + path, data=body, method=method)
+        try:
+            with opener.open(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except (http.client.HTTPException, OSError):
+            # Dropped connection or truncated body (e.g. a stream failing
+            # mid-page): counted as an error, like a 5xx, so the run goes on
+            return TRANSPORT_ERROR
+
+    def request(self, session, method, path, data=None):
+        return self._send(session, method, path, data)
+
+    def close(self):
+        self.server.shutdown()
+
+
+def _quiet_handler():
+    from werkzeug.serving import WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass  # Keep the benchmark output readable
+
+    return QuietHandler
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report 302s as-is instead of following them (like the test client)."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(driver, name, requests, concurrency, max_id, seed):
+    """Run one scenario and return its stats (latencies in milliseconds)."""
+    method, path, data = SCENARIOS[name]
+    rng = random.Random(seed)
+    paths = [path(rng, max_id) if callable(path) else path for _ in range(requests)]
+
+    driver.request(driver.session(), method, paths[0], data)  # Warm-up (template compile, caches)
+
+    def one(p):
+        session = driver.session()  # Per-thread login happens outside the timing
+        start = time.perf_counter()
+        status = driver.request(session, method, p, data)
+        return (time.perf_counter() - start) * 1000, status
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # Log every worker thread in before the clock starts; the barrier
+        # makes each warm-up task land on a different thread
+        barrier = threading.Barrier(concurrency)
+        list(pool.map(lambda _: (driver.session(), barrier.wait()), range(concurrency)))
+
+        started = time.perf_counter()
+        results = list(pool.map(one, paths))
+        wall = time.perf_counter() - started
+
+    latencies = sorted(ms for ms, _ in results)
+    errors = sum(1 for _, status in results if status >= 500)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "mean": statistics.fmean(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "rps": requests / wall if wall else 0.0,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return the scenarios whose p95 regressed by more than `tolerance`."""
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base and base["p95"] > 0 and stats["p95"] > base["p95"] * (1 + tolerance):
+            regressions.append((name, base["p95"], stats["p95"]))
+    return regressions
+
+
+# -----------------------------
+# Entry Point
+# -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Flask app.")
+    parser.add_argument("--db", default=Config.DATABASE, help="database to run against")
+    parser.add_argument("--mode", choices=("client", "wsgi"), default="client")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable; default: all)")
+    parser.add_argument("--no-page-cache", action="store_true", help="disable the rendered-page cache")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 regression (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    from core.app_factory import create_app
+
+    class BenchConfig(Config):
+        DATABASE = os.path.abspath(args.db)
+        PAGE_CACHE_ENABLED = not args.no_page_cache
+        LOGIN_THROTTLE_ENABLED = False  # The login scenario posts the same account repeatedly
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        from core.extensions import get_db_connection
+        max_id = get_db_connection().execute("SELECT MAX(id) FROM books").fetchone()[0] or 1
+
+    driver = TestClientDriver(app) if args.mode == "client" else WSGIDriver(app)
+    results = {}
+    try:
+        print(f"{'scenario':<18}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'errors':>8}")
+        for name in args.scenario or list(SCENARIOS):
+            stats = run_scenario(driver, name, args.requests, args.concurrency, max_id, args.seed)
+            results[name] = stats
+            print(f"{name:<18}{stats['p50']:>9.2f}{stats['p95']:>9.2f}{stats['p99']:>9.2f}"
+                  f"{stats['rps']:>9.1f}{stats['errors']:>8}")
+    finally:
+        if isinstance(driver, WSGIDriver):
+            driver.close()
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against (run with --save-baseline).")
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for name, before, after in regressions:
+        print(f"REGRESSION {name}: p95 {before:.2f} ms -> {after:.2f} ms")
+    if not regressions:
+        print("No p95 regressions against the baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
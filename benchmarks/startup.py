@@ -0,0 +1,94 @@
+"""
+benchmarks/startup.py
+
+Check cold worker startup against a budget.
+
+Each run starts a fresh interpreter that imports the project and calls
+create_app(), then reports the wall time of that import + build, the peak
+resident memory of the process and any heavy optional dependencies that
+were imported eagerly. The median over --runs is compared with the budget;
+going over it (or importing a deferred dependency) makes the exit code 1.
+
+Usage:
+    (venv) $ python -m benchmarks.startup
+    (venv) $ python -m benchmarks.startup --max-seconds 0.5 --max-rss-mb 60 --runs 5
+    (venv) $ python -m benchmarks.startup --db benchmarks/data/100000.sqlite3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from config import Config
+
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only specific pages need; importing them at startup is a regression
+DEFERRED_MODULES = ("openpyxl", "pandas", "numpy")
+
+# Runs in the child interpreter; prints one JSON line
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+from config import Config
+from core.app_factory import create_app
+class BenchConfig(Config):
+    DATABASE = %r
+create_app(BenchConfig)
+elapsed = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024  # macOS reports bytes
+print(json.dumps({
+    "seconds": elapsed,
+    "rss_mb": rss_kb / 1024,
+    "eager": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def probe(database):
+    """Measure one cold create_app() in a new interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE % (database, DEFERRED_MODULES)],
+        cwd=PROJECT_DIR, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check cold create_app() time and memory.")
+    parser.add_argument("--db", default=Config.DATABASE, help="database to start against")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to start (default: 3)")
+    parser.add_argument("--max-seconds", type=float, default=1.0, help="budget for import + create_app()")
+    parser.add_argument("--max-rss-mb", type=float, default=80.0, help="budget for peak resident memory")
+    args = parser.parse_args(argv)
+
+    results = [probe(os.path.abspath(args.db)) for _ in range(args.runs)]
+    seconds = statistics.median(r["seconds"] for r in results)
+    rss_mb = statistics.median(r["rss_mb"] for r in results)
+    eager = sorted({m for r in results for m in r["eager"]})
+
+    print(f"create_app(): {seconds * 1000:.0f} ms (budget {args.max_seconds * 1000:.0f} ms), "
+          f"peak RSS {rss_mb:.1f} MB (budget {args.max_rss_mb:.0f} MB)")
+
+    failures = []
+    if seconds > args.max_seconds:
+        failures.append("startup time over budget")
+    if rss_mb > args.max_rss_mb:
+        failures.append("memory over budget")
+    if eager:
+        failures.append("eagerly imported: " + ", ".join(eager))
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if not failures:
+        print("Startup within budget.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,4 +4,91 @@ class Config:
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     DATABASE = os.path.join(BASE_DIR, "instance", "db.sqlite3")
     SECRET_KEY = "The quick brown fox jumps over the fence."
+
+    # Feature blueprints to load: name -> URL prefix (apps/<name>/routes.py, <name>_bp).
+    # Remove an entry to disable that module in a deployment; "books" is required.
+    BLUEPRINTS = {
+        "primer": "/primer",
+        "categories": "/categories",
+        "books": "/books",
+        "excel": "/excel",
+        "api": "/api/v1",
+    }
+
+    # SQLite connection pool (see core/extensions.py)
+    DB_POOL_SIZE = 8                    # Max open connections per process
+    DB_POOL_TIMEOUT = 10                # Seconds to wait for a free connection
+    DB_JOURNAL_MODE = "WAL"             # Readers don't block the writer (and vice versa)
+    DB_SYNCHRONOUS = "NORMAL"           # Safe with WAL, far fewer fsyncs than FULL
+    DB_MMAP_SIZE = 64 * 1024 * 1024     # Bytes of the DB file to memory-map
+    DB_CACHE_SIZE = -16000              # Page cache; negative = KiB (here ~16 MB)
+    DB_BUSY_TIMEOUT = 5000              # Milliseconds to wait on a locked database
+
+    # Database writer (see core/writer.py)
+    WRITE_BATCH_WINDOW_MS = 2           # Writes arriving this close together share one transaction
+    WRITE_BATCH_MAX = 64                # Max writes per transaction
+    WRITE_TIMEOUT = 10                  # Seconds a request waits for its write to start
+    WRITE_LOCK_FILE = None              # e.g. os.path.join(BASE_DIR, "instance", "write.lock") to serialize writers across processes
+
+    # Change log for incremental sync (see core/changes.py, /api/v1/changes)
+    CHANGE_LOG_MAX_ROWS = 100000        # Entries kept after compaction (None disables compaction)
+    CHANGE_LOG_COMPACT_EVERY = 1000     # New entries between compactions
+
+    # In-memory read snapshot (see core/snapshot.py)
+    READ_SNAPSHOT = False               # Serve catalogue reads from a per-process in-memory copy of the DB
+
+    # Rendered-page cache (see core/cache.py)
+    PAGE_CACHE_ENABLED = True
+    PAGE_CACHE_SIZE = 512               # Max cached pages per process (LRU)
+    PAGE_CACHE_DIR = None               # e.g. os.path.join(BASE_DIR, "instance", "page_cache") to share across workers
+    PAGE_CACHE_DIR_MAX_ENTRIES = 4096   # Files kept in PAGE_CACHE_DIR; the least recently used are pruned
+    PAGE_CACHE_MAX_STREAMED = 1024 * 1024  # Largest streamed page (bytes) copied into the cache
+
+    # Instrumentation (see core/metrics.py, /metrics)
+    METRICS_ENABLED = True
+    METRICS_SERVER_TIMING = False       # Add a Server-Timing header to every response
+
+    # Query diagnostics (see core/diagnostics.py, /debug/queries in debug mode)
+    QUERY_DIAGNOSTICS = False           # Record every statement and its EXPLAIN QUERY PLAN
+    SLOW_QUERY_MS = 100                 # Log statements slower than this (None disables)
+
+    # Login protection (see core/throttle.py)
+    LOGIN_VERIFY_WORKERS = 2            # Concurrent PBKDF2 verifications per process
+    LOGIN_VERIFY_BACKLOG = 8            # Attempts allowed to wait for a worker; more get 429
+    LOGIN_VERIFY_TIMEOUT = 5            # Seconds a request waits for its verification
+    LOGIN_THROTTLE_ENABLED = True
+    LOGIN_USER_BURST = 5                # Attempts per username before throttling...
+    LOGIN_USER_PER_MINUTE = 5           # ...then refilled at this rate
+    LOGIN_IP_BURST = 20                 # Same, per client IP
+    LOGIN_IP_PER_MINUTE = 20
+
+    # Templates (see core/app_factory.py)
+    TEMPLATE_BYTECODE_CACHE_DIR = os.path.join(BASE_DIR, "instance", "jinja_cache")  # None disables
+    TEMPLATE_PRECOMPILE = True          # Load every template in create_app() instead of on first use
+
+    # Response compression (see core/middleware.py)
+    COMPRESS_ENABLED = True
+    COMPRESS_GZIP_LEVEL = 6             # 1 (fast) .. 9 (small)
+    COMPRESS_BROTLI_QUALITY = 5         # 0 (fast) .. 11 (small); brotli is used only if installed
+    COMPRESS_MIN_SIZE = 500             # Bytes; smaller bodies are sent uncompressed
+    COMPRESS_CACHE_SIZE = 256           # Compressed bodies of ETagged (cached) pages kept per process
+    COMPRESS_MIMETYPES = (
+        "text/html", "text/plain", "text/css", "text/csv", "text/javascript",
+        "application/json", "application/x-ndjson", "application/javascript", "image/svg+xml",
+    )
+
+    # Static assets (see core/assets.py; rebuild with `flask build-assets`)
+    ASSETS_FINGERPRINT = True           # Serve the hashed files listed in static/dist/manifest.json
+    ASSETS_MAX_AGE = 365 * 24 * 3600    # Seconds browsers may cache a fingerprinted file
+
+    # Production server (see gunicorn.conf.py; command-line flags override these)
+    SERVER_BIND = "127.0.0.1:8000"
+    SERVER_PROXY_COUNT = 1              # Reverse proxies in front setting X-Forwarded-For (0 = clients connect directly)
+    SERVER_WORKERS = None               # Worker processes; None = one per CPU core
+    SERVER_THREADS = 4                  # Threads per worker (I/O overlap; CPU work needs processes)
+    SERVER_MAX_REQUESTS = 5000          # Recycle a worker after this many requests (0 = never)
+    SERVER_MAX_REQUESTS_JITTER = 500    # Spread recycling so workers don't restart together
+    SERVER_GRACEFUL_TIMEOUT = 30        # Seconds in-flight requests get on restart/reload
+    SERVER_WATCH_DATABASE = True        # Reload workers when DATABASE is replaced by a new file
+
     # Add other global configs if needed
@@ -7,26 +7,30 @@ This file defines `create_app()`, which builds and configures the Flask app.
 It handles:
     - Template and static folder paths
     - Loading configuration
+    - Trusting X-Forwarded-For from the reverse proxy (`SERVER_PROXY_COUNT`)
     - Root route redirection (login or books list)
-    - Blueprint registration
+    - Blueprint registration (only the ones listed in `Config.BLUEPRINTS`)
+    - Jinja bytecode cache and optional template precompilation
     - Global authentication, error handlers, and middleware
 """
 
+import importlib
 import os
 from flask import Flask, redirect, url_for, session
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from config import Config
 
-# Import blueprints (feature-based modules)
-from apps.primer.routes import primer_bp
-from apps.categories.routes import categories_bp
-from apps.books.routes import books_bp
-from apps.excel.routes import excel_bp
-
 # Import core infrastructure
+from core.assets import register_assets
 from core.auth import register_auth
+from core.commands import register_commands
 from core.errors import register_error_handlers
+from core.extensions import init_db
 from core.middleware import register_middleware
+from core.snapshot import init_snapshot
+from core.warmup import precompile_templates
 
 
 # -----------------------------
@@ -42,8 +46,14 @@ BASE_DIR = os.path.abspath(
 # -----------------------------
 # Application Factory
 # -----------------------------
-def create_app():
-    """Builds and returns a fully configured Flask application."""
+def create_app(config_object=Config):
+    """
+    Builds and returns a fully configured Flask application.
+
+    Args:
+        config_object: Configuration class to load (defaults to `Config`).
+                       Tests and benchmarks pass a subclass to point at another DB.
+    """
 
     # Create Flask app with explicit template and static paths
     app = Flask(
@@ -53,7 +63,18 @@ def create_app():
     )
 
     # Load configuration from config.py
-    app.config.from_object(Config)
+    app.config.from_object(config_object)
+
+    # Behind a reverse proxy every request comes from the proxy's address;
+    # take the client's from X-Forwarded-For instead (e.g. for login throttling).
+    # Only the last SERVER_PROXY_COUNT entries are trusted; ones a client adds are ignored.
+    if app.config["SERVER_PROXY_COUNT"]:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["SERVER_PROXY_COUNT"])
+
+    # Compiled templates are kept on disk and shared by every worker
+    if app.config["TEMPLATE_BYTECODE_CACHE_DIR"]:
+        os.makedirs(app.config["TEMPLATE_BYTECODE_CACHE_DIR"], exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config["TEMPLATE_BYTECODE_CACHE_DIR"])
 
     # -------------------------
     # Root route
@@ -70,19 +91,35 @@ def create_app():
     # -------------------------
     # Register blueprints
     # -------------------------
-    # Modular feature-based routes (e.g., books, categories)
-    app.register_blueprint(primer_bp, url_prefix="/primer")		
-    app.register_blueprint(categories_bp, url_prefix="/categories")
-    app.register_blueprint(books_bp, url_prefix="/books")
-    app.register_blueprint(excel_bp, url_prefix="/excel")		
+    # Modular feature-based routes (e.g., books, categories). Only enabled
+    # blueprints are imported, so a disabled module costs nothing at startup.
+    for name, url_prefix in app.config["BLUEPRINTS"].items():
+        app.register_blueprint(load_blueprint(name), url_prefix=url_prefix)
 
     # -------------------------
     # Register global infrastructure
     # -------------------------
-    # Authentication, error handlers, and middleware
+    # Database pool and read snapshot, static assets, authentication, error handlers, middleware and CLI commands
+    init_db(app)
+    init_snapshot(app)
+    register_assets(app)
     register_auth(app)
     register_error_handlers(app)
     register_middleware(app)
+    register_commands(app)
+
+    # Load every template now rather than on each one's first request
+    if app.config["TEMPLATE_PRECOMPILE"]:
+        precompile_templates(app)
 
     # Return the configured Flask app
     return app
+
+
+# -----------------------------
+# Blueprint Loader
+# -----------------------------
+def load_blueprint(name):
+    """Import `apps/<name>/routes.py` and return its `<name>_bp` blueprint."""
+    module = importlib.import_module(f"apps.{name}.routes")
+    return getattr(module, f"{name}_bp")
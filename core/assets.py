@@ -0,0 +1,200 @@
+"""
+core/assets.py
+
+Static asset pipeline for the Flask project.
+
+Everything the pages load is served from `static/` (no CDNs):
+    - static/src/app.css   : Tailwind input, compiled to static/css/app.css
+                             with only the classes used in the templates
+    - static/vendor/       : jQuery and DataTables, vendored as released
+    - static/favicon.svg
+
+`flask build-assets` compiles the CSS, then copies every asset into
+`static/dist/` under a content-hashed name (plus `.gz` / `.br` variants)
+and writes `static/dist/manifest.json`. At runtime:
+    - `url_for('static', filename=...)` returns the fingerprinted URL
+    - Fingerprinted files are served with `Cache-Control: immutable` and,
+      when the client accepts it, as their precompressed variant
+Files missing from the manifest are served as plain static files.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import subprocess
+
+from flask import request, send_from_directory
+
+try:
+    import brotli  # Optional: .br variants are skipped without it
+except ImportError:
+    brotli = None
+
+
+DIST_DIR = "dist"  # Inside the static folder
+MANIFEST = "manifest.json"
+SOURCE_DIRS = ("src", DIST_DIR)  # Never copied to dist
+
+# Assets worth precompressing (images are already compressed)
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".txt")
+
+# url(...) references inside CSS, rewritten to their fingerprinted names
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+# -----------------------------
+# Register Asset Serving
+# -----------------------------
+def register_assets(app):
+    """
+    Serve fingerprinted assets from the build manifest.
+
+    - Rewrites `url_for('static', ...)` to fingerprinted paths
+    - Replaces the static view so fingerprinted files get long-lived
+      immutable caching and precompressed (br/gzip) bodies
+    """
+    manifest = load_manifest(app) if app.config["ASSETS_FINGERPRINT"] else {}
+    fingerprinted = set(manifest.values())
+    app.extensions["asset_manifest"] = manifest
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = manifest[values["filename"]]
+
+    def static(filename):
+        """Send a static file, preferring a precompressed variant of built assets."""
+        if filename not in fingerprinted:
+            return app.send_static_file(filename)
+
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            variant = filename + suffix
+            if encoding in request.accept_encodings and os.path.isfile(os.path.join(app.static_folder, variant)):
+                response = send_from_directory(app.static_folder, variant, mimetype=mimetype)
+                response.headers["Content-Encoding"] = encoding
+                break
+        else:
+            response = send_from_directory(app.static_folder, filename, mimetype=mimetype)
+
+        response.headers["Cache-Control"] = f"public, max-age={app.config['ASSETS_MAX_AGE']}, immutable"
+        response.vary.add("Accept-Encoding")
+        return response
+
+    app.view_functions["static"] = static
+
+
+def load_manifest(app):
+    """Return {logical path: fingerprinted path} from the last build ({} if never built)."""
+    path = os.path.join(app.static_folder, DIST_DIR, MANIFEST)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+# -----------------------------
+# Build
+# -----------------------------
+def build_assets(app, tailwind="tailwindcss", clean=False):
+    """
+    Compile the CSS bundle and write fingerprinted, precompressed copies.
+
+    Older fingerprinted files are kept unless `clean` is set, so pages
+    rendered (or cached) before a deploy keep working.
+
+    Returns:
+        (manifest dict, whether the Tailwind CLI ran)
+    """
+    static_dir = app.static_folder
+    compiled = compile_css(static_dir, tailwind)
+
+    dist = os.path.join(static_dir, DIST_DIR)
+    if clean:
+        shutil.rmtree(dist, ignore_errors=True)
+    os.makedirs(dist, exist_ok=True)
+
+    # Non-CSS first, so CSS url() references can point at fingerprinted names
+    sources = sorted(_iter_sources(static_dir), key=lambda name: name.endswith(".css"))
+    manifest = {}
+    for name in sources:
+        with open(os.path.join(static_dir, name), "rb") as f:
+            data = f.read()
+        if name.endswith(".css"):
+            data = _rewrite_css_urls(name, data, manifest)
+
+        hashed = _hashed_name(name, data)
+        _write(os.path.join(static_dir, hashed), data)
+        manifest[name] = hashed
+
+    with open(os.path.join(dist, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest, compiled
+
+
+def compile_css(static_dir, tailwind):
+    """Run the Tailwind CLI on static/src/app.css; False if the CLI isn't installed."""
+    if shutil.which(tailwind) is None:
+        return False
+    subprocess.run(
+        [tailwind, "--input", os.path.join(static_dir, "src", "app.css"),
+         "--output", os.path.join(static_dir, "css", "app.css"), "--minify"],
+        check=True,
+    )
+    return True
+
+
+def _iter_sources(static_dir):
+    """Yield static files (as posix paths relative to static/) to fingerprint."""
+    for root, dirs, files in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        if rel_root == ".":
+            dirs[:] = [d for d in dirs if d not in SOURCE_DIRS]
+        for filename in files:
+            yield posixpath.normpath(posixpath.join(rel_root.replace(os.sep, "/"), filename))
+
+
+def _hashed_name(name, data):
+    """css/app.css -> dist/css/app.<hash>.css"""
+    base, ext = posixpath.splitext(name)
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return posixpath.join(DIST_DIR, f"{base}.{digest}{ext}")
+
+
+def _rewrite_css_urls(name, data, manifest):
+    """Point relative url(...) references of a CSS file at their fingerprinted copies."""
+    hashed_dir = posixpath.dirname(posixpath.join(DIST_DIR, name))
+
+    def replace(match):
+        quote, target = match.groups()
+        path, _, suffix = target.partition("?")
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(name), path))
+        if resolved not in manifest:
+            return match.group(0)  # data:, absolute and external URLs stay as they are
+        new = posixpath.relpath(manifest[resolved], hashed_dir)
+        return f"url({quote}{new}{'?' + suffix if suffix else ''}{quote})"
+
+    return CSS_URL.sub(replace, data.decode("utf-8")).encode("utf-8")
+
+
+def _write(path, data):
+    """Write an asset and its .gz / .br variants (when they are smaller)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if not path.endswith(COMPRESSIBLE):
+        return
+
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
@@ -5,12 +5,16 @@ Authentication routes and session management for the Flask project.
 
 This file registers login and logout routes using the `register_auth()` function.
 It keeps authentication logic centralized, so blueprints do not handle sessions directly.
+Password checks run on a bounded pool and attempts are throttled per username
+and per client IP (see core/throttle.py).
 """
 
-from flask import render_template, request, redirect, url_for, session, flash
-from passlib.hash import django_pbkdf2_sha256
+import math
+
+from flask import render_template, request, redirect, url_for, session, flash, current_app
 
 from core.extensions import get_db_connection  # Shared DB connection helper
+from core.throttle import LoginOverloaded, get_login_throttles, get_verify_pool
 from functools import wraps
 from flask import abort
 
@@ -35,6 +39,8 @@ def register_auth(app):
         Handle user login.
 
         POST:
+            - Rejects the attempt with 429 if the username or client IP is
+              out of attempts, or if the verification pool is saturated
             - Verifies username and password against the database
             - Sets session['user_id'] and session['username'] on success
             - Redirects to books list if login succeeds
@@ -46,16 +52,24 @@ def register_auth(app):
             username = request.form["username"]
             password = request.form["password"]
 
-            # Connect to DB and fetch user
+            retry_after = throttle_login(username)
+            if retry_after:
+                return too_many_attempts(retry_after)
+
+            # Fetch user with the request's pooled connection
             conn = get_db_connection()
             user = conn.execute(
-                "SELECT * FROM auth_user WHERE username = ?",
+                "SELECT id, username, password FROM auth_user WHERE username = ?",
                 (username,)
             ).fetchone()
-            conn.close()
 
-            # Verify password using Django PBKDF2 hash
-            if user and django_pbkdf2_sha256.verify(password, user["password"]):
+            # Verify password using Django PBKDF2 hash, off the request thread
+            try:
+                valid = user is not None and get_verify_pool().verify(password, user["password"])
+            except LoginOverloaded:
+                return too_many_attempts(1)
+
+            if valid:
                 # Successful login
                 session["user_id"] = user["id"]
                 session["username"] = user["username"]
@@ -79,6 +93,30 @@ def register_auth(app):
         session.clear()
         return redirect(url_for("login"))
 
+# -----------------------------
+# Login Throttling Helpers
+# -----------------------------
+def throttle_login(username):
+    """
+    Charge one attempt to the username and the client IP.
+
+    Behind a proxy, `request.remote_addr` is the client's address taken
+    from X-Forwarded-For (see `SERVER_PROXY_COUNT`).
+
+    Returns:
+        0 if the attempt may proceed, otherwise seconds until it may be retried
+    """
+    if not current_app.config["LOGIN_THROTTLE_ENABLED"]:
+        return 0
+    per_user, per_ip = get_login_throttles()
+    return max(per_user.consume(username.lower()), per_ip.consume(request.remote_addr or "-"))
+
+
+def too_many_attempts(retry_after):
+    """Render the login form with a 429 and a Retry-After header."""
+    flash("Too many login attempts, please try again shortly", "error")
+    return render_template("login.html"), 429, {"Retry-After": str(math.ceil(retry_after))}
+
 # ---------------------------
 # Admin Required Decorator
 # ---------------------------
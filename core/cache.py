@@ -0,0 +1,311 @@
+"""
+core/cache.py
+
+Rendered-page cache for read-heavy views.
+
+This file defines the `@cached_page` decorator and `bump_generation()`.
+Book and category data only changes when an admin writes, so rendered
+responses are kept until the next write:
+
+    - Entries live in an in-process LRU, with an optional shared on-disk
+      backend (`Config.PAGE_CACHE_DIR`, bounded by
+      `PAGE_CACHE_DIR_MAX_ENTRIES`) so all workers reuse each other's pages
+    - Keys combine endpoint, view arguments, the query arguments the view
+      declares and the session user (templates branch on `session.username`)
+    - Every entry records the data generation it was rendered at; write
+      handlers call `bump_generation()`, which makes older entries stale in
+      every process because the counter lives in the database
+    - Responses carry ETag and Last-Modified, and conditional GETs get a 304
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request, session, Response
+
+from core.extensions import get_db_connection
+
+
+# -----------------------------
+# Data Generation Counter
+# -----------------------------
+def get_generation():
+    """Return (generation, updated_at) of the catalogue data."""
+    row = get_db_connection().execute(
+        "SELECT generation, updated_at FROM data_generation WHERE id = 1"
+    ).fetchone()
+    return row["generation"], row["updated_at"]
+
+
+def bump_generation(conn=None):
+    """
+    Mark all cached pages as stale.
+
+    Call this from every handler that writes books or categories. Pass the
+    connection of the write so the bump commits in the same transaction.
+    """
+    conn = conn or get_db_connection()
+    conn.execute(
+        "UPDATE data_generation SET generation = generation + 1, updated_at = ? WHERE id = 1",
+        (time.time(),),
+    )
+
+
+# -----------------------------
+# Cache Backends
+# -----------------------------
+class MemoryCache:
+    """A thread-safe, size-bounded LRU mapping."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DiskCache:
+    """
+    A directory of pickled entries shared by every worker process.
+
+    Holds at most `max_entries` files: reads refresh a file's mtime, and
+    once a write takes the directory over the limit, the least recently
+    used tenth is deleted.
+    """
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".cache")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+            os.utime(path)  # Recently used: pruned last
+            return entry
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    def set(self, key, entry):
+        # Write to a temp file, then rename, so readers never see half a file
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(entry, f)
+        os.replace(tmp, self._path(key))
+        self._prune()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass  # Already gone (another worker got there first)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".cache"):
+                os.remove(os.path.join(self.directory, name))
+
+    def _prune(self):
+        """Delete the least recently used files once there are more than `max_entries`."""
+        files = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith(".cache"):
+                    try:
+                        files.append((item.stat().st_mtime, item.path))
+                    except OSError:
+                        pass
+        excess = len(files) - self.max_entries
+        if excess <= 0:
+            return
+        # Go a bit below the limit so the next writes don't each rescan
+        files.sort()
+        for _, path in files[:excess + self.max_entries // 10]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class PageCache:
+    """In-process LRU in front of an optional shared disk cache."""
+
+    def __init__(self, max_entries, directory=None, disk_max_entries=4096):
+        self.memory = MemoryCache(max_entries)
+        self.disk = DiskCache(directory, disk_max_entries) if directory else None
+
+    def get(self, key, generation):
+        """Return the entry for `key` if it was rendered at `generation`; drop stale ones."""
+        entry = self.memory.get(key)
+        if entry is not None and entry["generation"] != generation:
+            self.memory.delete(key)
+            entry = None
+        if entry is None and self.disk:
+            entry = self.disk.get(key)
+            if entry is not None and entry["generation"] != generation:
+                if entry["generation"] < generation:
+                    self.disk.delete(key)  # Stale for every worker
+                entry = None
+            if entry is not None:
+                self.memory.set(key, entry)
+        return entry
+
+    def set(self, key, entry):
+        self.memory.set(key, entry)
+        if self.disk:
+            self.disk.set(key, entry)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk:
+            self.disk.clear()
+
+
+def get_page_cache(app=None):
+    """Return the app's PageCache, creating it on first use."""
+    app = app or current_app
+    cache = app.extensions.get("page_cache")
+    if cache is None:
+        cache = PageCache(
+            app.config["PAGE_CACHE_SIZE"],
+            app.config["PAGE_CACHE_DIR"],
+            app.config["PAGE_CACHE_DIR_MAX_ENTRIES"],
+        )
+        app.extensions["page_cache"] = cache
+    return cache
+
+
+# -----------------------------
+# Cached Page Decorator
+# -----------------------------
+def _cache_key(query_args):
+    """
+    Build the cache key for the current request.
+
+    Only the query arguments named in `query_args` are part of the key, so
+    cache-busters (DataTables' `_=`) or junk parameters can't multiply the
+    entries of one page.
+    """
+    args = [(name, value) for name in sorted(query_args) for value in request.args.getlist(name)]
+    view_args = sorted((request.view_args or {}).items())
+    user = session.get("username") or ""
+    return f"{request.endpoint}|{view_args}|{args}|{user}"
+
+
+def cached_page(view=None, *, query_args=()):
+    """
+    Cache a GET view's rendered response until the next data write.
+
+    Use as `@cached_page`, or `@cached_page(query_args=("sort", "order"))`
+    for views whose output depends on the query string: every argument the
+    view reads must be listed, all others are ignored.
+
+    Only successful (200) responses are stored. Streamed responses are
+    passed through and copied into the cache as they are sent, up to
+    `PAGE_CACHE_MAX_STREAMED` bytes (bigger pages are not cached, so memory
+    stays bounded). Hits and non-streamed misses get ETag / Last-Modified
+    headers and honour conditional requests (If-None-Match /
+    If-Modified-Since -> 304).
+    """
+    if view is None:
+        return lambda view: cached_page(view, query_args=query_args)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != "GET" or not current_app.config["PAGE_CACHE_ENABLED"]:
+            return view(*args, **kwargs)
+
+        cache = get_page_cache()
+        key = _cache_key(query_args)
+        generation, updated_at = get_generation()
+
+        entry = cache.get(key, generation)
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if response.is_streamed:
+                response.response = _tee_into_cache(
+                    response.response, cache, key, generation, response.mimetype,
+                    current_app.config["PAGE_CACHE_MAX_STREAMED"],
+                )
+                return response
+
+            body = response.get_data()
+            entry = {
+                "generation": generation,
+                "body": body,
+                "mimetype": response.mimetype,
+                "etag": hashlib.sha1(body).hexdigest(),
+            }
+            cache.set(key, entry)
+
+        response = Response(entry["body"], mimetype=entry["mimetype"])
+        response.set_etag(entry["etag"])
+        response.last_modified = updated_at
+        response.headers["Cache-Control"] = "private, no-cache"  # Always revalidate
+        response.vary.add("Cookie")
+        return response.make_conditional(request)
+
+    return wrapper
+
+
+def _tee_into_cache(chunks, cache, key, generation, mimetype, limit):
+    """Yield a streamed body, storing it in the cache once fully sent (if under `limit`)."""
+    parts, size = [], 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if parts is not None:
+                size += len(chunk)
+                if size > limit:
+                    parts = None  # Too big to cache; stop copying
+                else:
+                    parts.append(chunk)
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+    if parts is not None:
+        body = b"".join(parts)
+        cache.set(key, {
+            "generation": generation,
+            "body": body,
+            "mimetype": mimetype,
+            "etag": hashlib.sha1(body).hexdigest(),
+        })
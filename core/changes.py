@@ -0,0 +1,89 @@
+"""
+core/changes.py
+
+Change-data capture for books and categories.
+
+Triggers (see core/schema.py) append one `change_log` row per inserted,
+updated or deleted book or category, numbered by a monotonic `seq`. A
+mirror, search indexer or cache layer keeps up by reading the entries
+after the last seq it has seen (`/api/v1/changes?since=<seq>`) and
+re-fetching the rows they name, instead of re-reading the whole catalogue.
+
+Compaction bounds the log:
+    - Entries superseded by a newer entry for the same row are dropped; a
+      reader only needs the latest operation per row, so every cursor stays
+      valid (treat "insert" and "update" alike, as upserts)
+    - Beyond `CHANGE_LOG_MAX_ROWS`, the oldest entries are dropped and
+      `change_log_state.purged_through` records the highest seq removed;
+      readers behind it must resync from the full listings
+"""
+
+
+# -----------------------------
+# Reading the Log
+# -----------------------------
+def get_latest_seq(conn):
+    """Return the highest seq ever logged (0 if nothing was)."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
+
+
+def get_purged_through(conn):
+    """Return the highest seq removed by size-bounded compaction."""
+    return conn.execute("SELECT purged_through FROM change_log_state WHERE id = 1").fetchone()[0]
+
+
+def get_changes(conn, since, limit):
+    """
+    Return up to `limit` log entries with seq > `since`, oldest first.
+
+    Returns:
+        list of dicts: {"seq", "table", "id", "op", "changed_at"}
+    """
+    rows = conn.execute(
+        """
+        SELECT seq, table_name, row_id, op, changed_at
+        FROM change_log
+        WHERE seq > ?
+        ORDER BY seq
+        LIMIT ?
+        """,
+        (since, limit),
+    )
+    return [
+        {"seq": seq, "table": table, "id": row_id, "op": op, "changed_at": changed_at}
+        for seq, table, row_id, op, changed_at in rows
+    ]
+
+
+# -----------------------------
+# Compaction
+# -----------------------------
+def compact_change_log(conn, max_rows):
+    """
+    Drop superseded entries, then all but the newest `max_rows`.
+
+    Runs in the caller's transaction (use the writer's connection).
+
+    Returns:
+        number of entries removed
+    """
+    removed = conn.execute(
+        """
+        DELETE FROM change_log
+        WHERE seq NOT IN (
+            SELECT MAX(seq) FROM change_log GROUP BY table_name, row_id
+        )
+        """
+    ).rowcount
+
+    cutoff = conn.execute(
+        "SELECT seq FROM change_log ORDER BY seq DESC LIMIT 1 OFFSET ?", (max_rows,)
+    ).fetchone()
+    if cutoff is not None:
+        removed += conn.execute("DELETE FROM change_log WHERE seq <= ?", (cutoff[0],)).rowcount
+        conn.execute(
+            "UPDATE change_log_state SET purged_through = MAX(purged_through, ?) WHERE id = 1",
+            (cutoff[0],),
+        )
+    return removed
@@ -0,0 +1,72 @@
+"""
+core/commands.py
+
+Custom `flask` CLI commands for the project.
+
+This file defines `register_commands()` which attaches maintenance commands
+to the app, e.g.:
+
+    (venv) $ flask --app app rebuild-search
+    (venv) $ flask --app app build-assets
+    (venv) $ flask --app app compact-changes
+"""
+
+import sqlite3
+
+import click
+
+from core.assets import build_assets
+from core.changes import compact_change_log
+from core.schema import rebuild_search_index
+
+
+# -----------------------------
+# Register CLI Commands
+# -----------------------------
+def register_commands(app):
+    """
+    Attach custom CLI commands to the Flask app.
+
+    Commands:
+        - rebuild-search  : Re-index every book in the full-text search table
+        - build-assets    : Compile, fingerprint and precompress static assets
+        - compact-changes : Compact the change log now (normally done by the writer)
+    """
+
+    @app.cli.command("rebuild-search")
+    def rebuild_search():
+        """Rebuild the books full-text search index (books_fts)."""
+        conn = sqlite3.connect(app.config["DATABASE"])
+        try:
+            with conn:
+                rebuild_search_index(conn)
+            count = conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+        finally:
+            conn.close()
+        click.echo(f"Search index rebuilt for {count} books.")
+
+    @app.cli.command("build-assets")
+    @click.option("--tailwind", default="tailwindcss", help="Tailwind CLI executable.")
+    @click.option("--clean", is_flag=True, help="Remove previously built files first.")
+    def build_assets_command(tailwind, clean):
+        """Build static/css/app.css and the fingerprinted files in static/dist."""
+        manifest, compiled = build_assets(app, tailwind=tailwind, clean=clean)
+        if not compiled:
+            click.echo(f"'{tailwind}' not found; kept the existing static/css/app.css.")
+        click.echo(f"Fingerprinted {len(manifest)} files into static/dist.")
+
+    @app.cli.command("compact-changes")
+    @click.option("--max-rows", type=int, default=None, help="Entries to keep (default: CHANGE_LOG_MAX_ROWS).")
+    def compact_changes(max_rows):
+        """Drop superseded change-log entries and cap the log's size."""
+        max_rows = max_rows if max_rows is not None else app.config["CHANGE_LOG_MAX_ROWS"]
+        if max_rows is None:
+            raise click.UsageError("CHANGE_LOG_MAX_ROWS is None; pass --max-rows.")
+        conn = sqlite3.connect(app.config["DATABASE"], timeout=app.config["DB_BUSY_TIMEOUT"] / 1000)
+        try:
+            with conn:
+                removed = compact_change_log(conn, max_rows)
+            kept = conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0]
+        finally:
+            conn.close()
+        click.echo(f"Removed {removed} change-log entries, {kept} kept.")
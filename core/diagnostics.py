@@ -0,0 +1,107 @@
+"""
+core/diagnostics.py
+
+Query diagnostics for the shared DB helper.
+
+When `Config.QUERY_DIAGNOSTICS` is on, every statement run through a pooled
+connection is recorded here:
+    - Call count, total and slowest duration per distinct statement
+    - Its `EXPLAIN QUERY PLAN`, captured once per distinct statement, with
+      full table scans and temp b-tree sorts flagged
+Statements slower than `Config.SLOW_QUERY_MS` are logged (SQL, parameters,
+duration) whether or not diagnostics are on.
+
+The collected statements are listed at `/debug/queries` (admin only, and
+only while the app runs in debug mode), see core/middleware.py.
+"""
+
+import re
+import sqlite3
+import threading
+
+from flask import current_app
+
+
+MAX_STATEMENTS = 500  # Distinct statements kept per process
+
+# Statements worth explaining (EXPLAIN QUERY PLAN is meaningless for PRAGMA etc.)
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+# "SCAN b" is a full table scan; "SCAN b USING [COVERING] INDEX ..." is not
+FULL_SCAN = re.compile(r"^SCAN \S+$")
+
+
+# -----------------------------
+# Statement Registry
+# -----------------------------
+class StatementStats:
+    """Aggregated timings and the query plan of one distinct statement."""
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.plan = None  # List of plan lines once captured
+
+    @property
+    def full_scan(self):
+        return any(FULL_SCAN.match(line) for line in self.plan or [])
+
+    @property
+    def temp_sort(self):
+        return any("USE TEMP B-TREE" in line for line in self.plan or [])
+
+
+_statements = {}
+_lock = threading.Lock()
+
+
+def normalize(sql):
+    """Collapse whitespace so the same statement always maps to one entry."""
+    return " ".join(sql.split())
+
+
+def record(conn, sql, parameters, elapsed):
+    """Account one statement and capture its plan the first time it is seen."""
+    key = normalize(sql)
+    with _lock:
+        stats = _statements.get(key)
+        if stats is None:
+            if len(_statements) >= MAX_STATEMENTS:
+                return
+            stats = _statements[key] = StatementStats(key)
+        stats.calls += 1
+        stats.total += elapsed
+        stats.slowest = max(stats.slowest, elapsed)
+        needs_plan = stats.plan is None
+
+    if needs_plan:
+        stats.plan = explain(conn, sql, parameters)
+
+
+def explain(conn, sql, parameters):
+    """Return the EXPLAIN QUERY PLAN lines of a statement ([] if not explainable)."""
+    if parameters is None or not EXPLAINABLE.match(sql):
+        return []
+    try:
+        # Plain sqlite3.Connection.execute, so the EXPLAIN itself isn't recorded
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    except Exception as e:  # The plan is best-effort diagnostics
+        return [f"(plan unavailable: {e})"]
+    return [row[3] for row in rows]
+
+
+def log_slow(sql, parameters, elapsed):
+    """Log a statement slower than `SLOW_QUERY_MS`."""
+    current_app.logger.warning(
+        "Slow query (%.1f ms): %s params=%r", elapsed * 1000, normalize(sql), parameters
+    )
+
+
+def get_statements():
+    """Return recorded statements, most expensive (total time) first."""
+    with _lock:
+        statements = list(_statements.values())
+    return sorted(statements, key=lambda s: s.total, reverse=True)
+
@@ -5,10 +5,202 @@ Shared extensions and helpers for the Flask project.
 
 This file centralizes utilities like database connections, so blueprints
 and other modules can reuse them consistently.
+
+Database connections are:
+    - Request-scoped: one connection per request, stored on `g`
+    - Pooled: handed out from a bounded per-process pool and returned on teardown
+    - Tuned once: WAL journal, synchronous, mmap, cache and busy timeout pragmas
+      are applied when a pooled connection is first opened (see `Config.DB_*`)
+    - Instrumented: every statement is counted and timed per request
+      (see core/metrics.py)
 """
 
+import os
+import queue
 import sqlite3
-from flask import current_app
+import threading
+import time
+from flask import current_app, g, has_app_context, has_request_context, request
+
+from core import diagnostics
+from core.metrics import SQL_DURATION
+from core.schema import ensure_schema
+
+
+# -----------------------------
+# Statement Instrumentation
+# -----------------------------
+def record_statement(conn, sql, parameters, elapsed):
+    """
+    Account one executed statement to the current request.
+
+    - Adds to `g.sql_count` / `g.sql_time` and the per-endpoint SQL histogram
+    - Logs it if slower than `SLOW_QUERY_MS`
+    - Records it (and its query plan) when `QUERY_DIAGNOSTICS` is on
+    """
+    if not has_app_context():
+        return
+    g.sql_count = g.get("sql_count", 0) + 1
+    g.sql_time = g.get("sql_time", 0.0) + elapsed
+
+    config = current_app.config
+    if config["METRICS_ENABLED"]:
+        SQL_DURATION.observe(elapsed, request.endpoint if has_request_context() else "-")
+    if config["SLOW_QUERY_MS"] is not None and elapsed * 1000 >= config["SLOW_QUERY_MS"]:
+        diagnostics.log_slow(sql, parameters, elapsed)
+    if config["QUERY_DIAGNOSTICS"]:
+        diagnostics.record(conn, sql, parameters, elapsed)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    sqlite3 connection that times `execute()` and `executemany()`.
+
+    The measured time covers preparing the statement and running it to the
+    first result row; rows fetched later while iterating are not included.
+    """
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_statement(self, sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_statement(self, sql, None, time.perf_counter() - start)
+
+
+# -----------------------------
+# Connection Pool
+# -----------------------------
+class ConnectionPool:
+    """
+    A bounded pool of SQLite connections for a single database file.
+
+    Connections are created lazily up to `size`. When all of them are in use,
+    `acquire()` waits up to `timeout` seconds for one to be released.
+    """
+
+    def __init__(self, database, size, timeout, pragmas):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """
+        Open a new connection and apply the configured pragmas once.
+
+        Used for the pool itself and for the writer thread's own connection
+        (see core/writer.py), which is never handed out by the pool.
+        """
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.pragmas["busy_timeout"] / 1000,
+            check_same_thread=False,  # Connections move between request threads
+            factory=InstrumentedConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA journal_mode = {self.pragmas['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {self.pragmas['synchronous']}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.pragmas['mmap_size'])}")
+        conn.execute(f"PRAGMA cache_size = {int(self.pragmas['cache_size'])}")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.pragmas['busy_timeout'])}")
+        return conn
+
+    def acquire(self):
+        """Return an idle connection, opening a new one if the pool is not full."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self.connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out after {self.timeout}s waiting for a database connection"
+            )
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding any uncommitted work."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            # Broken connection: drop it so a fresh one can be opened
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown or worker recycle)."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+# One pool per (process, database file). Keyed by PID so forked workers never
+# share a parent's open SQLite handles.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(app=None):
+    """Return the connection pool for the app's database in this process."""
+    app = app or current_app
+    config = app.config
+    key = (os.getpid(), config["DATABASE"])
+
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(
+                    config["DATABASE"],
+                    size=config["DB_POOL_SIZE"],
+                    timeout=config["DB_POOL_TIMEOUT"],
+                    pragmas={
+                        "journal_mode": config["DB_JOURNAL_MODE"],
+                        "synchronous": config["DB_SYNCHRONOUS"],
+                        "mmap_size": config["DB_MMAP_SIZE"],
+                        "cache_size": config["DB_CACHE_SIZE"],
+                        "busy_timeout": config["DB_BUSY_TIMEOUT"],
+                    },
+                )
+                _pools[key] = pool
+    return pool
 
 
 # -----------------------------
@@ -16,15 +208,59 @@ from flask import current_app
 # -----------------------------
 def get_db_connection():
     """
-    Create and return a SQLite database connection using the app's configuration.
+    Return the SQLite connection for the current request.
 
     Features:
         - Uses `current_app.config["DATABASE"]` to locate the DB file
         - Sets `row_factory` to `sqlite3.Row` for dict-like access to rows
+        - The first call in a request borrows a connection from the pool and
+          stores it on `g`; later calls in the same request reuse it
+        - The connection is returned to the pool by `close_db_connection()`,
+          so callers must NOT call `conn.close()` themselves
 
     Returns:
         sqlite3.Connection: A connection object to the SQLite database
     """
-    conn = sqlite3.connect(current_app.config["DATABASE"])
-    conn.row_factory = sqlite3.Row
-    return conn
+    if "db_conn" not in g:
+        g.db_conn = get_pool().acquire()
+    return g.db_conn
+
+
+def close_db_connection(exception=None):
+    """Return the request's connection (if any) to the pool."""
+    if g.get("db_conn_streaming"):
+        return  # Still used by the streamed body; returned when it is closed
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        get_pool().release(conn)
+
+
+def hand_over_to_stream(response):
+    """
+    Keep the request's connection until a streamed response is closed.
+
+    A streamed body keeps reading (and, e.g. for keyset pages, querying)
+    after the view's teardown has run. The connection stays on `g`, so the
+    body reuses it instead of borrowing a second one, and it is returned to
+    the pool when the server closes the response.
+    """
+    if response.is_streamed and "db_conn" in g:
+        g.db_conn_streaming = True
+        conn = g.db_conn
+        pool = get_pool()
+        response.call_on_close(lambda: pool.release(conn))
+    return response
+
+
+def init_db(app):
+    """
+    Attach the database helpers to the Flask app.
+
+    - Applies the app's schema additions (indexes, etc.) from core/schema.py
+    - Registers `close_db_connection()` as an app-context teardown so every
+      request hands its connection back to the pool (streamed responses
+      hand it back when they are closed, see `hand_over_to_stream()`)
+    """
+    ensure_schema(app)
+    app.after_request(hand_over_to_stream)
+    app.teardown_appcontext(close_db_connection)
@@ -0,0 +1,102 @@
+"""
+core/metrics.py
+
+In-process latency histograms exposed in Prometheus text format.
+
+This file holds the metric objects and the text exporter; the hooks that
+feed them live in core/middleware.py (requests, templates) and
+core/extensions.py (SQL statements). Values are per worker process.
+"""
+
+import bisect
+import threading
+
+
+# Latency buckets in seconds (upper bounds, Prometheus "le")
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statement-count buckets for "queries per request"
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+# -----------------------------
+# Histogram
+# -----------------------------
+class Histogram:
+    """A labelled histogram: one set of bucket counters per label tuple."""
+
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        """Return the histogram in Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+
+        for label_values, values in sorted(series.items()):
+            labels = ",".join(
+                f'{label}="{_escape(value)}"' for label, value in zip(self.labels, label_values)
+            )
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {values[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {values[-2]}")
+            lines.append(f"{self.name}_count{{{labels}}} {values[-1]}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+REQUEST_DURATION = Histogram(
+    "flask_request_duration_seconds",
+    "Request latency by endpoint, method and status code.",
+    ("endpoint", "method", "status"),
+)
+SQL_DURATION = Histogram(
+    "flask_sql_statement_duration_seconds",
+    "Duration of each SQL statement by endpoint.",
+    ("endpoint",),
+)
+SQL_PER_REQUEST = Histogram(
+    "flask_sql_statements_per_request",
+    "Number of SQL statements executed per request.",
+    ("endpoint",),
+    buckets=COUNT_BUCKETS,
+)
+TEMPLATE_DURATION = Histogram(
+    "flask_template_render_seconds",
+    "Jinja render time by template.",
+    ("template",),
+)
+
+ALL_METRICS = (REQUEST_DURATION, SQL_DURATION, SQL_PER_REQUEST, TEMPLATE_DURATION)
+
+
+def render_prometheus():
+    """Return every metric as one Prometheus text document."""
+    return "\n".join(metric.render() for metric in ALL_METRICS) + "\n"
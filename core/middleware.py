@@ -4,10 +4,30 @@ core/middleware.py
 Global request middleware for the Flask project.
 
 This file defines `register_middleware()` which attaches application-wide
-before_request hooks. Currently, it enforces login for protected routes.
+before_request/after_request hooks. Currently, it:
+    - Enforces login for protected routes
+    - Compresses HTML/JSON/text responses (gzip or brotli), including
+      streamed ones
+    - Times every request, SQL statement and template render, exposing the
+      histograms at the admin-only `/metrics` endpoint (Prometheus format)
+    - Serves the debug-only `/debug/queries` page (see core/diagnostics.py)
 """
 
-from flask import request, redirect, url_for, session
+import gzip
+import time
+import zlib
+
+from flask import request, redirect, url_for, session, g, Response, template_rendered, before_render_template, abort, render_template, jsonify
+
+from core.auth import admin_required
+from core.cache import MemoryCache
+from core.diagnostics import get_statements
+from core.metrics import REQUEST_DURATION, SQL_PER_REQUEST, TEMPLATE_DURATION, render_prometheus
+
+try:
+    import brotli  # Optional: without it, only gzip is offered
+except ImportError:
+    brotli = None
 
 
 # -----------------------------
@@ -15,9 +35,12 @@ from flask import request, redirect, url_for, session
 # -----------------------------
 def register_middleware(app):
     """
-    Attach global before_request hooks to the Flask app.
+    Attach global before_request/after_request hooks to the Flask app.
 
-    Currently enforces that users must be logged in to access protected routes.
+    - Enforces that users must be logged in to access protected routes
+    - Compresses eligible responses when `COMPRESS_ENABLED` is set
+    - Records request, SQL and template timings when `METRICS_ENABLED` is set,
+      and adds a `Server-Timing` header when `METRICS_SERVER_TIMING` is set
     """
 
     @app.before_request
@@ -31,6 +54,7 @@ def register_middleware(app):
                 * static (for CSS, JS, images)
                 * page_not_found (404 handler)
             - If 'user_id' not in session, redirect to '/login'
+              (API requests get a 401 JSON error instead)
         """
         if request.endpoint in ("login", "static", "page_not_found"):
             # Allow unauthenticated access to these endpoints
@@ -38,4 +62,184 @@ def register_middleware(app):
 
         # Require login for all other routes
         if "user_id" not in session:
+            if request.blueprint == "api":
+                return jsonify({"error": "Login required"}), 401
             return redirect(url_for("login"))
+
+    # -------------------------
+    # Query Diagnostics Page (Admin + Debug Only)
+    # -------------------------
+    @app.route("/debug/queries")
+    @admin_required
+    def debug_queries():
+        """List distinct SQL statements with call counts, timings and plans."""
+        if not app.debug:
+            abort(404)
+        return render_template(
+            "debug_queries.html",
+            title="Query Diagnostics",
+            statements=get_statements(),
+            enabled=app.config["QUERY_DIAGNOSTICS"],
+            threshold=app.config["SLOW_QUERY_MS"],
+        )
+
+    # -------------------------
+    # Response Compression
+    # -------------------------
+    if app.config["COMPRESS_ENABLED"]:
+        compressed_bodies = MemoryCache(app.config["COMPRESS_CACHE_SIZE"])
+
+        @app.after_request
+        def compress_response(response):
+            """
+            Compress the response body with the best encoding the client accepts.
+
+            Rules:
+                - Only `COMPRESS_MIMETYPES`, and never already-encoded bodies or
+                  file responses (static files are precompressed at build time)
+                - Bodies under `COMPRESS_MIN_SIZE` bytes are sent as they are
+                - Streamed responses are compressed chunk by chunk
+                - Bodies with an ETag (cached pages) are compressed once and reused
+            """
+            if (response.mimetype not in app.config["COMPRESS_MIMETYPES"]
+                    or response.status_code < 200 or response.status_code in (204, 304)
+                    or "Content-Encoding" in response.headers or response.direct_passthrough):
+                return response
+
+            response.vary.add("Accept-Encoding")
+            encoding = choose_encoding()
+            if encoding is None:
+                return response
+
+            response.headers["Content-Encoding"] = encoding
+            if response.is_streamed:
+                response.response = compress_stream(response.response, encoding, app.config)
+                response.headers.pop("Content-Length", None)
+                return response
+
+            body = response.get_data()
+            if len(body) < app.config["COMPRESS_MIN_SIZE"]:
+                del response.headers["Content-Encoding"]
+                return response
+
+            etag, weak = response.get_etag()
+            key = (etag, encoding) if etag else None
+            data = compressed_bodies.get(key) if key else None
+            if data is None:
+                data = compress_body(body, encoding, app.config)
+                if key:
+                    compressed_bodies.set(key, data)
+            response.set_data(data)
+            if etag and not weak:
+                # Same content, different bytes: a weak ETag still matches If-None-Match
+                response.set_etag(etag, weak=True)
+            return response
+
+    # -------------------------
+    # Instrumentation
+    # -------------------------
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    @app.before_request
+    def start_timer():
+        """Remember when the request started (runs after require_login)."""
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        """Observe request latency, SQL count and optionally add Server-Timing."""
+        start = g.pop("request_start", None)
+        if start is None:
+            return response  # Short-circuited before the timer started
+
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or "-"
+        REQUEST_DURATION.observe(elapsed, endpoint, request.method, str(response.status_code))
+        SQL_PER_REQUEST.observe(g.get("sql_count", 0), endpoint)
+
+        if app.config["METRICS_SERVER_TIMING"]:
+            response.headers["Server-Timing"] = ", ".join([
+                f"app;dur={elapsed * 1000:.2f}",
+                f'db;dur={g.get("sql_time", 0.0) * 1000:.2f};desc="{g.get("sql_count", 0)} queries"',
+                f"tpl;dur={g.get('template_time', 0.0) * 1000:.2f}",
+            ])
+        return response
+
+    def template_started(sender, template, context, **extra):
+        g.template_start = time.perf_counter()
+
+    def template_finished(sender, template, context, **extra):
+        start = g.pop("template_start", None)
+        if start is not None:
+            elapsed = time.perf_counter() - start
+            g.template_time = g.get("template_time", 0.0) + elapsed
+            TEMPLATE_DURATION.observe(elapsed, template.name or "-")
+
+    # weak=False: the handlers are closures that would otherwise be garbage collected
+    before_render_template.connect(template_started, app, weak=False)
+    template_rendered.connect(template_finished, app, weak=False)
+
+    # -------------------------
+    # Metrics Endpoint (Admin Only)
+    # -------------------------
+    @app.route("/metrics")
+    @admin_required
+    def metrics():
+        """Expose this worker's histograms in Prometheus text format."""
+        return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+# -----------------------------
+# Compression Helpers
+# -----------------------------
+def choose_encoding():
+    """Return "br", "gzip" or None for the current request's Accept-Encoding."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress_body(body, encoding, config):
+    """Compress a complete body."""
+    if encoding == "br":
+        return brotli.compress(body, quality=config["COMPRESS_BROTLI_QUALITY"])
+    return gzip.compress(body, compresslevel=config["COMPRESS_GZIP_LEVEL"])
+
+
+def compress_stream(chunks, encoding, config, flush_every=16 * 1024):
+    """
+    Compress a streamed body, flushing periodically.
+
+    The first chunk (usually the page head) is flushed at once, then output
+    is flushed every `flush_every` bytes of input, so the client keeps
+    receiving data without a sync flush per tiny chunk hurting the ratio.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=config["COMPRESS_BROTLI_QUALITY"])
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(config["COMPRESS_GZIP_LEVEL"], zlib.DEFLATED, 31)  # 31 = gzip container
+        compress, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    pending = flush_every  # Flush the first chunk immediately
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = compress(chunk)
+            pending += len(chunk)
+            if pending >= flush_every:
+                data += flush()
+                pending = 0
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,205 @@
+"""
+core/schema.py
+
+Schema additions the Flask app maintains on top of the base tables.
+
+The `books`, `categories` and `auth_user` tables come from the original
+Django project and are not created here. This file only adds indexes (and
+other objects) the app relies on for performance, caching and search. Every statement is
+idempotent (`IF NOT EXISTS`), so `ensure_schema()` is safe to run on every
+startup and against existing databases.
+"""
+
+import sqlite3
+
+
+# -----------------------------
+# Schema Statements
+# -----------------------------
+SCHEMA_STATEMENTS = [
+    # Keyset pagination / index-backed sorting for the books list.
+    # Each index ends in `id` so (sort_key, id) cursors seek directly.
+    'CREATE INDEX IF NOT EXISTS "books_published_date_id" ON "books" ("published_date", "id")',
+    'CREATE INDEX IF NOT EXISTS "books_author_id" ON "books" ("author", "id")',
+    'CREATE INDEX IF NOT EXISTS "books_title_id" ON "books" ("title", "id")',
+
+    # A category's books, newest first (categories.view): seeks within one
+    # category. Django's FK index on (category_id) stays as it is, since
+    # Django's migrations own it; it is recreated here in case an earlier
+    # version of this list dropped it.
+    'CREATE INDEX IF NOT EXISTS "books_category_id_published_date_id" ON "books" ("category_id", "published_date", "id")',
+    'CREATE INDEX IF NOT EXISTS "books_category_id_1efdc3d3" ON "books" ("category_id")',
+
+    # Data generation counter, bumped by every write to books/categories.
+    # Cached pages rendered at an older generation are stale (core/cache.py).
+    """
+    CREATE TABLE IF NOT EXISTS "data_generation" (
+        "id"         integer NOT NULL PRIMARY KEY CHECK ("id" = 1),
+        "generation" integer NOT NULL,
+        "updated_at" real NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO data_generation (id, generation, updated_at) VALUES (1, 0, CAST(strftime('%s', 'now') AS real))",
+
+    # Category cache version stamp, bumped by every categories write so each
+    # process reloads its in-memory copy (apps/categories/models.py)
+    """
+    CREATE TABLE IF NOT EXISTS "category_version" (
+        "id"      integer NOT NULL PRIMARY KEY CHECK ("id" = 1),
+        "version" integer NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO category_version (id, version) VALUES (1, 0)",
+
+    # Books per category, kept current by the triggers below so list pages
+    # never run COUNT(*) ... GROUP BY (backfilled once by ensure_schema())
+    """
+    CREATE TABLE IF NOT EXISTS "category_book_counts" (
+        "category_id" integer NOT NULL PRIMARY KEY,
+        "book_count"  integer NOT NULL
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS "books_count_ai" AFTER INSERT ON "books" BEGIN
+        INSERT INTO category_book_counts (category_id, book_count) VALUES (new.category_id, 1)
+        ON CONFLICT (category_id) DO UPDATE SET book_count = book_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS "books_count_ad" AFTER DELETE ON "books" BEGIN
+        UPDATE category_book_counts SET book_count = book_count - 1 WHERE category_id = old.category_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS "books_count_au" AFTER UPDATE OF category_id ON "books"
+    WHEN old.category_id IS NOT new.category_id BEGIN
+        UPDATE category_book_counts SET book_count = book_count - 1 WHERE category_id = old.category_id;
+        INSERT INTO category_book_counts (category_id, book_count) VALUES (new.category_id, 1)
+        ON CONFLICT (category_id) DO UPDATE SET book_count = book_count + 1;
+    END
+    """,
+    # Deleted (or merged) categories lose their row; the DELETE below clears
+    # rows left behind before this trigger existed
+    """
+    CREATE TRIGGER IF NOT EXISTS "categories_count_ad" AFTER DELETE ON "categories" BEGIN
+        DELETE FROM category_book_counts WHERE category_id = old.id;
+    END
+    """,
+    "DELETE FROM category_book_counts WHERE category_id NOT IN (SELECT id FROM categories)",
+
+    # Full-text search over books (external-content FTS5 table).
+    # The triggers keep it in sync with INSERT/UPDATE/DELETE on `books`.
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS "books_fts" USING fts5(
+        title, hepburn, author, summary,
+        content='books', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS "books_fts_ai" AFTER INSERT ON "books" BEGIN
+        INSERT INTO books_fts (rowid, title, hepburn, author, summary)
+        VALUES (new.id, new.title, new.hepburn, new.author, new.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS "books_fts_ad" AFTER DELETE ON "books" BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, hepburn, author, summary)
+        VALUES ('delete', old.id, old.title, old.hepburn, old.author, old.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS "books_fts_au" AFTER UPDATE ON "books" BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, hepburn, author, summary)
+        VALUES ('delete', old.id, old.title, old.hepburn, old.author, old.summary);
+        INSERT INTO books_fts (rowid, title, hepburn, author, summary)
+        VALUES (new.id, new.title, new.hepburn, new.author, new.summary);
+    END
+    """,
+
+    # Change log for incremental sync (core/changes.py, /api/v1/changes).
+    # Triggers record every insert/update/delete on books and categories;
+    # AUTOINCREMENT keeps `seq` monotonic even after compaction deletes rows.
+    """
+    CREATE TABLE IF NOT EXISTS "change_log" (
+        "seq"        integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+        "table_name" text NOT NULL,
+        "row_id"     integer NOT NULL,
+        "op"         text NOT NULL,
+        "changed_at" real NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "change_log_row" ON "change_log" ("table_name", "row_id", "seq")',
+    # Highest seq removed by size-bounded compaction; older cursors must resync
+    """
+    CREATE TABLE IF NOT EXISTS "change_log_state" (
+        "id"             integer NOT NULL PRIMARY KEY CHECK ("id" = 1),
+        "purged_through" integer NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO change_log_state (id, purged_through) VALUES (1, 0)",
+    *[
+        f"""
+        CREATE TRIGGER IF NOT EXISTS "{table}_log_{suffix}" AFTER {event} ON "{table}" BEGIN
+            INSERT INTO change_log (table_name, row_id, op, changed_at)
+            VALUES ('{table}', {ref}.id, '{op}', (julianday('now') - 2440587.5) * 86400.0);
+        END
+        """
+        for table in ("books", "categories")
+        for suffix, event, ref, op in (
+            ("ai", "INSERT", "new", "insert"),
+            ("au", "UPDATE", "new", "update"),
+            ("ad", "DELETE", "old", "delete"),
+        )
+    ],
+]
+
+
+# -----------------------------
+# Apply Schema
+# -----------------------------
+def ensure_schema(app):
+    """
+    Apply `SCHEMA_STATEMENTS` to the app's database.
+
+    Uses a short-lived connection outside the request pool, since it runs
+    at startup before any request exists.
+    """
+    conn = sqlite3.connect(app.config["DATABASE"], timeout=app.config["DB_BUSY_TIMEOUT"] / 1000)
+    try:
+        with conn:
+            had_fts = _table_exists(conn, "books_fts")
+            had_counts = _table_exists(conn, "category_book_counts")
+            for statement in SCHEMA_STATEMENTS:
+                conn.execute(statement)
+
+            # First run against an existing database: index/count the books already there
+            if not had_fts:
+                rebuild_search_index(conn)
+            if not had_counts:
+                rebuild_book_counts(conn)
+    finally:
+        conn.close()
+
+
+def _table_exists(conn, name):
+    """Return True if a table (or virtual table) called `name` exists."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def rebuild_search_index(conn):
+    """Rebuild the `books_fts` index from the current contents of `books`."""
+    conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+
+
+def rebuild_book_counts(conn):
+    """Recompute `category_book_counts` from the current contents of `books`."""
+    conn.execute("DELETE FROM category_book_counts")
+    conn.execute(
+        """
+        INSERT INTO category_book_counts (category_id, book_count)
+        SELECT category_id, COUNT(*) FROM books GROUP BY category_id
+        """
+    )
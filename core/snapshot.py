@@ -0,0 +1,148 @@
+"""
+core/snapshot.py
+
+In-memory read snapshot of the catalogue.
+
+With `Config.READ_SNAPSHOT` on, each process keeps a copy of the database
+in memory, made with the sqlite3 backup API, and catalogue reads (books,
+categories, search) run against that copy instead of the database file:
+
+    - The copy is a shared-cache in-memory database, so every request thread
+      of the process opens its own connection to the same data
+    - Once per request the `data_generation` counter is read from the file;
+      if any process has written since the copy was taken, a fresh copy is
+      made (full backup) before the request reads
+    - Refreshes build a new copy beside the old one and swap it in; requests
+      already reading the old copy finish on it undisturbed
+
+Reads then never wait on writer locks or slow (e.g. network-mounted) disk
+I/O; only the one-row counter is read from the file per request. Writes
+still go to the file (see core/writer.py).
+"""
+
+import os
+import sqlite3
+import threading
+
+from flask import current_app, g
+
+from core.extensions import InstrumentedConnection, get_db_connection
+
+
+# -----------------------------
+# Snapshot
+# -----------------------------
+class ReadSnapshot:
+    """The current in-memory copy of one database, for one process."""
+
+    def __init__(self, name):
+        self.name = name
+        self.generation = None  # data_generation of the current copy
+        self._uri = None
+        self._anchor = None  # Keeps the in-memory database alive between requests
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def connect(self, source):
+        """
+        Open a read-only connection to a copy at least as new as `source`.
+
+        Args:
+            source: A connection to the database file, used to read the change
+                    counter and, when the copy is stale, as the backup source
+        """
+        generation = _read_generation(source)
+        # Opened under the lock: a refresh closes the previous copy, and
+        # connecting to a closed in-memory database would create an empty one
+        with self._lock:
+            if self.generation != generation:
+                self.refresh(source)
+            conn = sqlite3.connect(
+                self._uri, uri=True, check_same_thread=False, factory=InstrumentedConnection
+            )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def refresh(self, source):
+        """Copy `source` into a new in-memory database and make it current."""
+        self._seq += 1
+        uri = f"file:{self.name}-{self._seq}?mode=memory&cache=shared"
+        anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        source.backup(anchor)
+
+        old = self._anchor
+        self._uri, self._anchor = uri, anchor
+        self.generation = _read_generation(anchor)
+        if old is not None:
+            old.close()  # Freed once the last request reading it closes its connection
+
+
+def _read_generation(conn):
+    return conn.execute("SELECT generation FROM data_generation WHERE id = 1").fetchone()[0]
+
+
+# One snapshot per (process, database file); threads share it, forks don't
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_snapshot(app=None):
+    """Return this process's snapshot holder for the app's database."""
+    app = app or current_app
+    key = (os.getpid(), app.config["DATABASE"])
+
+    snapshot = _snapshots.get(key)
+    if snapshot is None:
+        with _snapshots_lock:
+            snapshot = _snapshots.get(key)
+            if snapshot is None:
+                snapshot = _snapshots[key] = ReadSnapshot(f"catalogue-{os.getpid()}-{len(_snapshots)}")
+    return snapshot
+
+
+# -----------------------------
+# Read Connection Helper
+# -----------------------------
+def get_read_connection():
+    """
+    Return the connection catalogue reads should use in this request.
+
+    Features:
+        - With `READ_SNAPSHOT` off, this is the pooled connection of
+          `get_db_connection()`
+        - With it on, a connection to the in-memory snapshot (refreshed first
+          if the database changed), opened once per request and stored on `g`
+        - Read-only: writes must go through `run_write()` (core/writer.py)
+
+    Returns:
+        sqlite3.Connection
+    """
+    if not current_app.config["READ_SNAPSHOT"]:
+        return get_db_connection()
+    if "read_conn" not in g:
+        g.read_conn = get_snapshot().connect(get_db_connection())
+    return g.read_conn
+
+
+def close_read_connection(exception=None):
+    """Close the request's snapshot connection (if any)."""
+    if g.get("read_conn_streaming"):
+        return  # Closed with the streamed response
+    conn = g.pop("read_conn", None)
+    if conn is not None:
+        conn.close()
+
+
+def hand_over_to_stream(response):
+    """Keep the snapshot connection on `g` for a streamed body; close it with the response."""
+    if response.is_streamed and "read_conn" in g:
+        g.read_conn_streaming = True
+        response.call_on_close(g.read_conn.close)
+    return response
+
+
+def init_snapshot(app):
+    """Register the hooks that close snapshot connections."""
+    app.after_request(hand_over_to_stream)
+    app.teardown_appcontext(close_read_connection)
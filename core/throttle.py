@@ -0,0 +1,143 @@
+"""
+core/throttle.py
+
+Login protection for core/auth.py.
+
+PBKDF2 verification deliberately burns CPU (hundreds of milliseconds per
+attempt), so running it inline on request threads lets a burst of logins
+starve catalogue reads. This file provides:
+
+    - `VerifyPool`: a small bounded executor for password verification; once
+      its workers and waiting slots are full, attempts fail fast with
+      `LoginOverloaded` instead of queueing on request threads
+    - `TokenBucketStore`: per-key token buckets held in process memory, used
+      to throttle attempts per username and per client IP
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app
+from passlib.hash import django_pbkdf2_sha256
+
+
+class LoginOverloaded(Exception):
+    """Raised when no verification slot is free (the caller answers 429)."""
+
+
+# -----------------------------
+# Bounded Verification Pool
+# -----------------------------
+class VerifyPool:
+    """
+    Run password verification on at most `workers` threads.
+
+    `backlog` more attempts may wait for a worker; anything beyond that is
+    rejected immediately. A slot is held until its hash finishes, even if
+    the waiting request gave up, so the CPU spent stays bounded.
+    """
+
+    def __init__(self, workers, backlog, timeout):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pbkdf2")
+        self._slots = threading.BoundedSemaphore(workers + backlog)
+
+    def verify(self, password, hashed):
+        """Return whether `password` matches `hashed`, or raise LoginOverloaded."""
+        if not self._slots.acquire(blocking=False):
+            raise LoginOverloaded()
+        try:
+            future = self._executor.submit(django_pbkdf2_sha256.verify, password, hashed)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise LoginOverloaded() from None
+
+
+_verify_pools = {}
+_verify_pools_lock = threading.Lock()
+
+
+def get_verify_pool(app=None):
+    """Return this process's verification pool (executor threads don't survive a fork)."""
+    app = app or current_app
+    key = (os.getpid(), id(app))
+
+    pool = _verify_pools.get(key)
+    if pool is None:
+        with _verify_pools_lock:
+            pool = _verify_pools.get(key)
+            if pool is None:
+                config = app.config
+                pool = _verify_pools[key] = VerifyPool(
+                    workers=config["LOGIN_VERIFY_WORKERS"],
+                    backlog=config["LOGIN_VERIFY_BACKLOG"],
+                    timeout=config["LOGIN_VERIFY_TIMEOUT"],
+                )
+    return pool
+
+
+# -----------------------------
+# Token Buckets
+# -----------------------------
+class TokenBucketStore:
+    """
+    Token buckets keyed by arbitrary strings, kept in process memory.
+
+    Each bucket holds up to `capacity` tokens and refills at `rate` tokens
+    per second. Full buckets are dropped once more than `max_keys` exist,
+    which bounds memory when many distinct keys are seen.
+    """
+
+    def __init__(self, capacity, rate, max_keys=10000):
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, last refill time)
+        self._lock = threading.Lock()
+
+    def _level(self, key, now):
+        tokens, last = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - last) * self.rate)
+
+    def consume(self, key):
+        """
+        Take one token for `key`.
+
+        Returns:
+            0 if allowed, otherwise the seconds until a token is available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._level(key, now)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._buckets[key] = (tokens - 1, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return 0
+
+    def _prune(self, now):
+        for key in [k for k in self._buckets if self._level(k, now) >= self.capacity]:
+            del self._buckets[key]
+
+
+def get_login_throttles(app=None):
+    """Return the (per-username, per-IP) bucket stores of the app."""
+    app = app or current_app
+    throttles = app.extensions.get("login_throttles")
+    if throttles is None:
+        config = app.config
+        throttles = app.extensions.setdefault("login_throttles", (
+            TokenBucketStore(config["LOGIN_USER_BURST"], config["LOGIN_USER_PER_MINUTE"] / 60),
+            TokenBucketStore(config["LOGIN_IP_BURST"], config["LOGIN_IP_PER_MINUTE"] / 60),
+        ))
+    return throttles
@@ -0,0 +1,57 @@
+"""
+core/warmup.py
+
+Per-worker warm-up for the production server (see gunicorn.conf.py), and
+template precompilation at boot (see create_app()).
+
+A freshly forked worker would otherwise pay for its first connections,
+category load and template compiles on real requests. `warm_up()` does
+that work before the worker accepts traffic:
+
+    - Opens a pooled SQLite connection (applying the connection pragmas)
+    - Takes the in-memory read snapshot (when READ_SNAPSHOT is on)
+    - Loads the category cache
+    - Compiles every Jinja template into the environment's cache
+    - Creates the password verification pool
+"""
+
+import time
+
+from apps.categories.models import get_category_cache
+from core.extensions import get_db_connection
+from core.snapshot import get_read_connection
+from core.throttle import get_verify_pool
+
+
+def warm_up(app):
+    """
+    Prime the app's per-process caches.
+
+    Returns:
+        dict with the number of templates compiled and the seconds taken
+    """
+    started = time.perf_counter()
+    with app.app_context():
+        get_db_connection().execute("SELECT 1").fetchone()
+        get_read_connection()
+        get_category_cache()
+
+    templates = precompile_templates(app)
+    get_verify_pool(app)
+    return {"templates": templates, "seconds": time.perf_counter() - started}
+
+
+def precompile_templates(app):
+    """
+    Load every registered template into the Jinja environment's cache.
+
+    With a bytecode cache configured, templates compiled by an earlier
+    process are read back instead of being compiled again.
+
+    Returns:
+        number of templates loaded
+    """
+    names = app.jinja_env.list_templates(extensions=("html",))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
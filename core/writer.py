@@ -0,0 +1,247 @@
+"""
+core/writer.py
+
+Single-writer queue for database mutations.
+
+SQLite allows one writer at a time, so request threads that each open a
+write transaction just take turns on the database lock (and pay one commit
+each). Instead, every mutation is handed to one writer thread per process:
+
+    - Handlers pass a function `fn(conn)` to `run_write()` and wait on a
+      future for its return value (or its exception)
+    - The writer groups jobs that arrive within `WRITE_BATCH_WINDOW_MS` into
+      one transaction; each job runs inside its own savepoint, so a failing
+      job is rolled back alone and the rest of the batch still commits
+    - Futures resolve only after the COMMIT, so a returned value means the
+      write is durable
+    - With `WRITE_LOCK_FILE` set, writers of different processes (e.g.
+      Gunicorn workers) take turns on an exclusive file lock instead of
+      contending for the SQLite lock
+    - Every `CHANGE_LOG_COMPACT_EVERY` new change-log entries, the writer
+      compacts the log (see core/changes.py)
+
+The writer has its own connection, so readers (pooled connections, WAL)
+never wait behind it. Jobs run in an app context of their own: helpers
+such as `bump_generation(conn)` and `invalidate_categories(conn)` work as
+usual as long as they are given the writer's connection.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from contextlib import contextmanager
+
+from flask import current_app
+
+from core.changes import compact_change_log, get_latest_seq
+from core.extensions import get_pool
+
+try:
+    import fcntl  # POSIX only; without it WRITE_LOCK_FILE is ignored
+except ImportError:
+    fcntl = None
+
+
+_STOP = object()  # Queue sentinel: drain and exit
+
+
+# -----------------------------
+# Writer Thread
+# -----------------------------
+class WriteQueue:
+    """
+    Run write jobs on one dedicated thread, batching them into transactions.
+
+    Jobs are `(fn, future)` pairs; `fn` receives the writer's connection and
+    must not commit or roll back itself.
+    """
+
+    def __init__(self, app, batch_window, batch_max, timeout, lock_file=None,
+                 change_log_max_rows=None, compact_every=1000):
+        self.app = app
+        self.batch_window = batch_window
+        self.batch_max = batch_max
+        self.timeout = timeout
+        self.lock_file = lock_file if fcntl is not None else None
+        self.change_log_max_rows = change_log_max_rows
+        self.compact_every = compact_every
+        self._compacted_seq = 0
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn):
+        """Queue `fn(conn)` and return the Future of its result."""
+        future = Future()
+        self._jobs.put((fn, future))
+        return future
+
+    def run(self, fn):
+        """
+        Queue `fn(conn)` and wait for it to commit.
+
+        Returns:
+            whatever `fn` returned; exceptions raised by `fn` (or by the
+            commit) are re-raised in the caller
+        """
+        future = self.submit(fn)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            if future.cancel():
+                raise sqlite3.OperationalError(
+                    f"Timed out after {self.timeout}s waiting for the database writer"
+                ) from None
+            # Already part of a running batch: its outcome is decided by the commit
+            return future.result()
+
+    def close(self):
+        """Finish the queued jobs, stop the thread and close its connection."""
+        if self._thread.is_alive():
+            self._jobs.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        conn = get_pool(self.app).connect()
+        lock = open(self.lock_file, "a+b") if self.lock_file else None
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    with self.app.app_context():
+                        self._commit_batch(conn, batch, lock)
+                    if self.change_log_max_rows is not None:
+                        self._compact(conn, lock)
+                if stop:
+                    break
+        finally:
+            conn.close()
+            if lock is not None:
+                lock.close()
+
+    def _next_batch(self):
+        """Block for one job, then collect more for up to `batch_window` seconds."""
+        batch = []
+        job = self._jobs.get()
+        deadline = time.monotonic() + self.batch_window
+        while job is not _STOP:
+            fn, future = job
+            if future.set_running_or_notify_cancel():  # False if its caller gave up
+                batch.append(job)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_max or remaining <= 0:
+                return batch, False
+            try:
+                job = self._jobs.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False
+        return batch, True
+
+    def _commit_batch(self, conn, batch, lock):
+        """Run `batch` in one transaction and resolve its futures after COMMIT."""
+        outcomes = []
+        try:
+            with _locked(lock):
+                conn.execute("BEGIN IMMEDIATE")
+                for fn, future in batch:
+                    conn.execute("SAVEPOINT write_job")
+                    try:
+                        outcomes.append((future, fn(conn), None))
+                        conn.execute("RELEASE write_job")
+                    except Exception as exc:
+                        conn.execute("ROLLBACK TO write_job")
+                        conn.execute("RELEASE write_job")
+                        outcomes.append((future, None, exc))
+                conn.commit()
+        except Exception as exc:
+            # BEGIN/COMMIT failed (or a job broke the transaction): nothing was written
+            if conn.in_transaction:
+                conn.rollback()
+            for fn, future in batch:
+                future.set_exception(exc)
+            return
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def _compact(self, conn, lock):
+        """Compact the change log once enough entries were added since the last time."""
+        try:
+            latest = get_latest_seq(conn)
+            if latest - self._compacted_seq < self.compact_every:
+                return
+            with _locked(lock), conn:
+                compact_change_log(conn, self.change_log_max_rows)
+            self._compacted_seq = latest
+        except Exception:
+            # Maintenance only: retried after the next batch
+            self.app.logger.exception("Change log compaction failed")
+
+
+@contextmanager
+def _locked(lock):
+    """Hold the cross-process write lock (if configured) for the block."""
+    if lock is None:
+        yield
+        return
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# One writer per (process, app). Threads don't survive a fork, so each
+# Gunicorn worker starts its own on first use.
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_write_queue(app=None):
+    """Return this process's writer for the app, starting it on first use."""
+    app = app or current_app._get_current_object()
+    key = (os.getpid(), id(app))
+
+    writer = _writers.get(key)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None:
+                config = app.config
+                writer = _writers[key] = WriteQueue(
+                    app,
+                    batch_window=config["WRITE_BATCH_WINDOW_MS"] / 1000,
+                    batch_max=config["WRITE_BATCH_MAX"],
+                    timeout=config["WRITE_TIMEOUT"],
+                    lock_file=config["WRITE_LOCK_FILE"],
+                    change_log_max_rows=config["CHANGE_LOG_MAX_ROWS"],
+                    compact_every=config["CHANGE_LOG_COMPACT_EVERY"],
+                )
+    return writer
+
+
+def stop_write_queue(app):
+    """Drain and stop this process's writer for the app, if one was started."""
+    with _writers_lock:
+        writer = _writers.pop((os.getpid(), id(app)), None)
+    if writer is not None:
+        writer.close()
+
+
+def run_write(fn, app=None):
+    """
+    Run `fn(conn)` on the database writer and return its result.
+
+    Example:
+        def insert(conn):
+            conn.execute("INSERT INTO ...", params)
+            bump_generation(conn)
+        run_write(insert)
+    """
+    return get_write_queue(app).run(fn)
@@ -0,0 +1,98 @@
+"""
+gunicorn.conf.py
+
+Production server settings for the Flask project.
+
+Gunicorn preforks worker processes around `app:app` (create_app()), each
+running several threads. Settings come from the SERVER_* values in
+config.py, and command-line flags override them.
+
+Usage:
+    (venv) $ gunicorn                       # picks up this file automatically
+    (venv) $ gunicorn --workers 8 --bind 0.0.0.0:8000
+
+Operations (send signals to the master process):
+    - HUP  : zero-downtime reload; new workers load the current code and
+             database, old workers finish their requests and exit
+    - TERM : graceful shutdown (waits up to SERVER_GRACEFUL_TIMEOUT)
+    - USR2 : start a new master alongside the old one (binary upgrade)
+
+The master never imports the application, so a HUP always picks up new
+code. When SERVER_WATCH_DATABASE is set, replacing the database file (e.g.
+`mv new.sqlite3 instance/db.sqlite3`) triggers the same reload.
+"""
+
+import os
+import signal
+import threading
+import time
+
+from config import Config
+
+
+# -----------------------------
+# Server Settings
+# -----------------------------
+wsgi_app = "app:app"
+bind = Config.SERVER_BIND
+workers = Config.SERVER_WORKERS or os.cpu_count() or 1
+worker_class = "gthread"
+threads = Config.SERVER_THREADS
+max_requests = Config.SERVER_MAX_REQUESTS
+max_requests_jitter = Config.SERVER_MAX_REQUESTS_JITTER
+graceful_timeout = Config.SERVER_GRACEFUL_TIMEOUT
+preload_app = False  # Each worker imports the app itself, so reloads see new code
+
+
+# -----------------------------
+# Worker Hooks
+# -----------------------------
+def post_worker_init(worker):
+    """Warm the new worker's caches before it accepts requests."""
+    from core.warmup import warm_up  # Imported in the worker, never in the master
+
+    stats = warm_up(worker.wsgi)
+    worker.log.info("Worker %s warmed up: %d templates in %.2fs",
+                    worker.pid, stats["templates"], stats["seconds"])
+
+
+def worker_exit(server, worker):
+    """Finish queued writes and close the worker's SQLite connections on recycle or shutdown."""
+    if worker.wsgi is None:
+        return
+    from core.extensions import get_pool
+    from core.writer import stop_write_queue
+
+    stop_write_queue(worker.wsgi)
+    get_pool(worker.wsgi).close_all()
+
+
+# -----------------------------
+# Database Swap Watcher
+# -----------------------------
+def _file_id(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def _watch_database(server, path, interval=2.0):
+    """Send HUP to the master when `path` is replaced by a different file."""
+    current = _file_id(path)
+    while True:
+        time.sleep(interval)
+        seen = _file_id(path)
+        if seen is not None and seen != current:
+            server.log.info("Database file %s was replaced, reloading workers", path)
+            current = seen
+            os.kill(server.pid, signal.SIGHUP)
+
+
+def when_ready(server):
+    """Start the database watcher in the master once it is listening."""
+    if Config.SERVER_WATCH_DATABASE:
+        threading.Thread(
+            target=_watch_database, args=(server, Config.DATABASE), daemon=True, name="db-watcher"
+        ).start()